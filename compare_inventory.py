@@ -1,19 +1,27 @@
 import os
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
-from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from datetime import datetime
 
 downloads = os.path.join(os.path.expanduser("~"), "Downloads")
 hnau_csv = os.path.join(downloads, "hnau_production_skus_29_08_2025.csv")
 vs_csv   = os.path.join(downloads, "vs_products_snapshot_29_08_2025.csv")
 db_path  = os.path.join(downloads, "inventory.db")
+export_sqlite = False  # also write hnau_norm / vs_norm to db_path for ad-hoc SQL
+mismatch_top_k = None  # e.g. 500 to keep only the largest mismatches
 
 date_tag = datetime.today().strftime('%d_%m_%Y')
 export_mismatch = os.path.join(downloads, f"stock_mismatches_{date_tag}.csv")
 export_only_hnau = os.path.join(downloads, f"only_in_hnau_{date_tag}.csv")
 export_only_vs   = os.path.join(downloads, f"only_in_vs_{date_tag}.csv")
 
+# Arrow's default null tokens plus the two extra ones pandas' read_csv treats as NaN.
+_NULL_VALUES = pacsv.ConvertOptions().null_values + ["None", "<NA>"]
+
 def clean_sku(x: str) -> str:
     if pd.isna(x):
         return None
@@ -22,37 +30,81 @@ def clean_sku(x: str) -> str:
         return None
     return s.upper()
 
-def parse_qty_to_int(x) -> int:
+def to_nullable_int_series(series: pd.Series) -> pd.Series:
     """
-    Robust integer parsing for quantities:
-    - Accepts '', None => 0
+    Robust integer parsing for quantities, one column at a time:
+    - Blank / missing / non-numeric => 0
     - Strips commas/spaces
     - Supports '(123)' as -123
-    - Supports decimals like '41820.0' => rounds half up to int
-    - If non-numeric, returns 0
+    - Decimals like '41820.0' round half away from zero (ROUND_HALF_UP)
+    """
+    s = series.astype("string").str.strip().str.upper()
+    paren = (s.str.startswith("(") & s.str.endswith(")")).fillna(False)
+    s = s.str.slice(1, -1).where(paren, s).str.strip()
+    s = s.str.replace(",", "", regex=False)
+    s = s.mask(s.isin(["", "NULL", "NAN"]))
+    f = pd.to_numeric(s, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    f[~np.isfinite(f)] = 0.0
+    i = (np.sign(f) * np.floor(np.abs(f) + 0.5)).astype(np.int64)
+    i = np.where(paren.to_numpy(), -i, i)
+    return pd.Series(i, index=series.index, dtype="Int64")
+
+def empty_norm(extra: str) -> pd.DataFrame:
+    """Zero-row normalized frame with the usual sku / qty / <extra> dtypes."""
+    return pd.DataFrame({
+        "sku": pd.array([], dtype="string"),
+        "qty": pd.array([], dtype="Int64"),
+        extra: pd.array([], dtype="string"),
+    })
+
+def aggregate_by_sku(df: pd.DataFrame, extra: str) -> pd.DataFrame:
+    """
+    Equivalent of groupby("sku").agg(qty="sum", <extra>="min") via a sort
+    and np.add.reduceat: rows are sorted by sku then `extra` (nulls last),
+    so each group's first row already holds the minimum.
+    """
+    df = df.sort_values(["sku", extra], kind="stable", na_position="last")
+    sku = df["sku"].to_numpy(dtype=object)
+    if len(sku) == 0:
+        return empty_norm(extra)
+    starts = np.flatnonzero(np.r_[True, sku[1:] != sku[:-1]])
+    qty = np.add.reduceat(df["qty"].to_numpy(dtype=np.int64), starts)
+    return pd.DataFrame({
+        "sku": pd.array(sku[starts], dtype="string"),
+        "qty": pd.array(qty, dtype="Int64"),
+        extra: df[extra].astype("string").array[starts],
+    })
+
+def write_csv(df: pd.DataFrame, path: str) -> None:
+    """
+    Same output as df.to_csv(path, index=False), via Arrow's C++ writer.
+    Arrow's "needed" style still quotes every string, so values are written
+    unquoted; a value that would need quoting (or a pyarrow without
+    quoting_header) sends the frame through to_csv instead.
     """
-    if x is None or (isinstance(x, float) and pd.isna(x)):
-        return 0
-    s = str(x).strip()
-    if s == "" or s.upper() in {"NULL", "NAN"}:
-        return 0
-    is_paren_negative = s.startswith("(") and s.endswith(")")
-    if is_paren_negative:
-        s = s[1:-1]
-    s = s.replace(",", "")
     try:
-        d = Decimal(s)
-        i = int(d.to_integral_value(rounding=ROUND_HALF_UP))
-        return -i if is_paren_negative else i
-    except (InvalidOperation, ValueError):
-        try:
-            i = int(float(s))
-            return -i if is_paren_negative else i
-        except Exception:
-            return 0
+        options = pacsv.WriteOptions(quoting_style="none", quoting_header="none", eol=os.linesep)
+        pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path, write_options=options)
+    except (pa.ArrowInvalid, TypeError):
+        df.to_csv(path, index=False)
 
-def to_nullable_int_series(series: pd.Series) -> pd.Series:
-    return series.map(parse_qty_to_int).astype("Int64")
+def read_csv_columns(path: str, columns) -> pd.DataFrame:
+    """Read only `columns` from a CSV as strings using Arrow's block parser."""
+    table = pacsv.read_csv(
+        path,
+        read_options=pacsv.ReadOptions(block_size=64 << 20),
+        convert_options=pacsv.ConvertOptions(
+            column_types={c: pa.string() for c in columns},
+            include_columns=list(columns),
+            strings_can_be_null=True,
+            null_values=_NULL_VALUES,
+        ),
+    )
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+def sqlite_rows(df: pd.DataFrame):
+    """Plain tuples for executemany (pandas NA becomes None)."""
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
 
 def drop_object(conn, name: str):
     row = conn.execute(
@@ -67,138 +119,138 @@ def drop_object(conn, name: str):
         conn.execute(f"DROP TABLE IF EXISTS {name}")
 
 print("Loading CSVs...")
-hnau_df = pd.read_csv(
-    hnau_csv,
-    dtype={
-        "sku_oms_details_sku": "string",
-        "online_salable_qty_quantity": "string",
-        "sku_oms_details_sap_supplier_id": "string",
-    }
-)
-
-vs_df = pd.read_csv(
-    vs_csv,
-    dtype={
-        "account": "string",
-        "supplier_sku": "string",
-        "free_stock": "string",
-    }
-)
+# Arrow releases the GIL while parsing, so the two files load concurrently.
+with ThreadPoolExecutor(max_workers=2) as ex:
+    fut_h = ex.submit(
+        read_csv_columns,
+        hnau_csv,
+        ["sku_oms_details_sku", "online_salable_qty_quantity", "sku_oms_details_sap_supplier_id"],
+    )
+    fut_v = ex.submit(
+        read_csv_columns,
+        vs_csv,
+        ["account", "supplier_sku", "free_stock"],
+    )
+    hnau_df, vs_df = fut_h.result(), fut_v.result()
 
 print("Normalizing data (SKU + qty types)...")
-hnau_norm = (
-    hnau_df.assign(
-        sku=hnau_df["sku_oms_details_sku"].map(clean_sku),
-        qty=to_nullable_int_series(hnau_df["online_salable_qty_quantity"]),
-        supplier_id=hnau_df["sku_oms_details_sap_supplier_id"].astype("string").str.strip()
+# Empty or all-null SKU columns skip the whole normalize/aggregate chain.
+if hnau_df["sku_oms_details_sku"].isna().all():
+    hnau_norm = empty_norm("supplier_id")
+else:
+    hnau_norm = (
+        hnau_df.assign(
+            sku=hnau_df["sku_oms_details_sku"].map(clean_sku),
+            qty=to_nullable_int_series(hnau_df["online_salable_qty_quantity"]),
+            supplier_id=hnau_df["sku_oms_details_sap_supplier_id"].astype("string").str.strip()
+        )
+        .dropna(subset=["sku"])
+        .pipe(aggregate_by_sku, "supplier_id")
     )
-    .dropna(subset=["sku"])
-    .groupby("sku", as_index=False)
-    .agg(qty=("qty", "sum"), supplier_id=("supplier_id", "min"))
-)
 
-vs_norm = (
-    vs_df.assign(
-        sku=vs_df["supplier_sku"].map(clean_sku),
-        qty=to_nullable_int_series(vs_df["free_stock"]),
-        account=vs_df["account"].astype("string").str.strip()
+if vs_df["supplier_sku"].isna().all():
+    vs_norm = empty_norm("account")
+else:
+    vs_norm = (
+        vs_df.assign(
+            sku=vs_df["supplier_sku"].map(clean_sku),
+            qty=to_nullable_int_series(vs_df["free_stock"]),
+            account=vs_df["account"].astype("string").str.strip()
+        )
+        .dropna(subset=["sku"])
+        .pipe(aggregate_by_sku, "account")
     )
-    .dropna(subset=["sku"])
-    .groupby("sku", as_index=False)
-    .agg(qty=("qty", "sum"), account=("account", "min"))
-)
 
-hnau_norm["qty"] = hnau_norm["qty"].astype("Int64")
-vs_norm["qty"]   = vs_norm["qty"].astype("Int64")
+# Shared, sorted SKU categories: the join runs on int codes and sorting by
+# sku stays lexicographic.
+sku_categories = pd.Index(pd.concat([hnau_norm["sku"], vs_norm["sku"]]).unique()).sort_values()
+hnau_norm["sku"] = pd.Categorical(hnau_norm["sku"], categories=sku_categories)
+vs_norm["sku"]   = pd.Categorical(vs_norm["sku"], categories=sku_categories)
 
-print("Writing normalized tables to SQLite...")
-conn = sqlite3.connect(db_path)
-cur = conn.cursor()
+print("Joining normalized tables...")
+merged = hnau_norm.merge(vs_norm, on="sku", how="outer", suffixes=("_h", "_v"), indicator=True)
+merged = merged.rename(columns={"qty_h": "hnau_qty", "qty_v": "vs_qty"})
+merged["qty_diff"] = (merged["vs_qty"].fillna(0) - merged["hnau_qty"].fillna(0)).astype("Int64")
+merged["status"] = np.select(
+    [
+        merged["_merge"].eq("left_only").to_numpy(),
+        merged["_merge"].eq("right_only").to_numpy(),
+        merged["qty_diff"].eq(0).to_numpy(dtype=bool, na_value=False),
+    ],
+    ["ONLY_IN_HNAU", "ONLY_IN_VS", "MATCH"],
+    default="QTY_MISMATCH",
+)
+joined = merged[["sku", "hnau_qty", "vs_qty", "qty_diff", "supplier_id", "account", "status"]]
 
-for name in ("hnau_norm", "vs_norm"):
-    drop_object(conn, name)
+# Split the joined frame by status once; stats and exports reuse the pieces.
+by_status = dict(tuple(joined.groupby("status", sort=False)))
+no_rows = joined.iloc[0:0]
+mismatch_rows = by_status.get("QTY_MISMATCH", no_rows)
+abs_diffs = mismatch_rows["qty_diff"].abs()
+stats_df = pd.DataFrame([{
+    "hnau_rows": len(hnau_norm),
+    "vs_rows": len(vs_norm),
+    "matches": len(by_status.get("MATCH", no_rows)),
+    "qty_mismatches": len(mismatch_rows),
+    "only_in_hnau": len(by_status.get("ONLY_IN_HNAU", no_rows)),
+    "only_in_vs": len(by_status.get("ONLY_IN_VS", no_rows)),
+    "total_hnau_qty": int(hnau_norm["qty"].sum()),
+    "total_vs_qty": int(vs_norm["qty"].sum()),
+    "sum_abs_qty_diff": int(abs_diffs.sum()),
+    "avg_abs_qty_diff": abs_diffs.mean() if len(abs_diffs) else None,
+}])
 
-cur.execute("""
-CREATE TABLE hnau_norm (
-    sku         TEXT PRIMARY KEY,
-    qty         INTEGER,
-    supplier_id TEXT
-)
-""")
-cur.execute("""
-CREATE TABLE vs_norm (
-    sku     TEXT PRIMARY KEY,
-    qty     INTEGER,
-    account TEXT
+# abs_diff is computed once up front rather than inside the sort key.
+mismatch_rows = mismatch_rows.assign(abs_diff=abs_diffs)
+if mismatch_top_k is not None:
+    # Heap selection, O(N log K); rows arrive sku-ordered so ties keep sku order.
+    mismatch_rows = mismatch_rows.nlargest(mismatch_top_k, "abs_diff", keep="first")
+mismatches_df = (
+    mismatch_rows
+    .sort_values(["abs_diff", "sku"], ascending=[False, True], kind="stable")
+    .drop(columns="abs_diff")
+    .reset_index(drop=True)
 )
-""")
-
-hnau_norm.to_sql("hnau_norm", conn, if_exists="append", index=False)
-vs_norm.to_sql("vs_norm", conn, if_exists="append", index=False)
-
-base_join = """
-WITH joined AS (
-  SELECT
-    h.sku AS sku,
-    CAST(h.qty AS INTEGER) AS hnau_qty,
-    CAST(v.qty AS INTEGER) AS vs_qty,
-    CAST((COALESCE(v.qty,0) - COALESCE(h.qty,0)) AS INTEGER) AS qty_diff,
-    h.supplier_id AS supplier_id,
-    v.account     AS account,
-    CASE
-      WHEN v.sku IS NULL THEN 'ONLY_IN_HNAU'
-      WHEN COALESCE(h.qty,0) = COALESCE(v.qty,0) THEN 'MATCH'
-      ELSE 'QTY_MISMATCH'
-    END AS status
-  FROM hnau_norm h
-  LEFT JOIN vs_norm v ON v.sku = h.sku
-
-  UNION ALL
-
-  SELECT
-    v.sku AS sku,
-    CAST(h.qty AS INTEGER) AS hnau_qty,
-    CAST(v.qty AS INTEGER) AS vs_qty,
-    CAST((COALESCE(v.qty,0) - COALESCE(h.qty,0)) AS INTEGER) AS qty_diff,
-    h.supplier_id AS supplier_id,
-    v.account     AS account,
-    'ONLY_IN_VS'  AS status
-  FROM vs_norm v
-  LEFT JOIN hnau_norm h ON h.sku = v.sku
-  WHERE h.sku IS NULL
-)
-"""
-
-stats_sql = base_join + """
-SELECT
-  (SELECT COUNT(*) FROM hnau_norm) AS hnau_rows,
-  (SELECT COUNT(*) FROM vs_norm)   AS vs_rows,
-  SUM(CASE WHEN status = 'MATCH'        THEN 1 ELSE 0 END) AS matches,
-  SUM(CASE WHEN status = 'QTY_MISMATCH' THEN 1 ELSE 0 END) AS qty_mismatches,
-  SUM(CASE WHEN status = 'ONLY_IN_HNAU' THEN 1 ELSE 0 END) AS only_in_hnau,
-  SUM(CASE WHEN status = 'ONLY_IN_VS'   THEN 1 ELSE 0 END) AS only_in_vs,
-  SUM(COALESCE(hnau_qty,0)) AS total_hnau_qty,
-  SUM(COALESCE(vs_qty,0))   AS total_vs_qty,
-  SUM(CASE WHEN status = 'QTY_MISMATCH' THEN ABS(qty_diff) ELSE 0 END) AS sum_abs_qty_diff,
-  AVG(CASE WHEN status = 'QTY_MISMATCH' THEN ABS(qty_diff) END)        AS avg_abs_qty_diff
-FROM joined;
-"""
-
-mismatch_sql = base_join + "SELECT * FROM joined WHERE status = 'QTY_MISMATCH' ORDER BY ABS(qty_diff) DESC, sku;"
-only_hnau_sql = base_join + "SELECT * FROM joined WHERE status = 'ONLY_IN_HNAU' ORDER BY sku;"
-only_vs_sql   = base_join + "SELECT * FROM joined WHERE status = 'ONLY_IN_VS'   ORDER BY sku;"
-
-stats_df      = pd.read_sql_query(stats_sql, conn)
-mismatches_df = pd.read_sql_query(mismatch_sql, conn)
-only_hnau_df  = pd.read_sql_query(only_hnau_sql, conn)
-only_vs_df    = pd.read_sql_query(only_vs_sql, conn)
-
-conn.close()
-
-for df in (mismatches_df, only_hnau_df, only_vs_df):
-    for col in ("hnau_qty", "vs_qty", "qty_diff"):
-        if col in df.columns:
-            df[col] = df[col].astype("Int64")
+only_hnau_df = by_status.get("ONLY_IN_HNAU", no_rows).sort_values("sku").reset_index(drop=True)
+only_vs_df   = by_status.get("ONLY_IN_VS", no_rows).sort_values("sku").reset_index(drop=True)
+
+if export_sqlite:
+    print("Writing normalized tables to SQLite...")
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+    PRAGMA journal_mode=OFF;
+    PRAGMA synchronous=OFF;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-262144;
+    PRAGMA locking_mode=EXCLUSIVE;
+    """)
+    cur = conn.cursor()
+
+    for name in ("hnau_norm", "vs_norm"):
+        drop_object(conn, name)
+
+    cur.execute("""
+    CREATE TABLE hnau_norm (
+        sku         TEXT,
+        qty         INTEGER,
+        supplier_id TEXT
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE vs_norm (
+        sku     TEXT,
+        qty     INTEGER,
+        account TEXT
+    )
+    """)
+
+    with conn:
+        cur.executemany("INSERT INTO hnau_norm VALUES (?, ?, ?)", sqlite_rows(hnau_norm))
+        cur.executemany("INSERT INTO vs_norm VALUES (?, ?, ?)", sqlite_rows(vs_norm))
+        # Build the sku indexes after the load: one sort instead of per-row B-tree inserts.
+        cur.execute("CREATE UNIQUE INDEX hnau_norm_sku ON hnau_norm(sku)")
+        cur.execute("CREATE UNIQUE INDEX vs_norm_sku ON vs_norm(sku)")
+    conn.close()
 
 print("\n=== SUMMARY STATS ===")
 print(stats_df.to_string(index=False))
@@ -212,12 +264,16 @@ print("None" if only_hnau_df.empty else only_hnau_df.to_string(index=False))
 print("\n=== ONLY_IN_VS ===")
 print("None" if only_vs_df.empty else only_vs_df.to_string(index=False))
 
-mismatches_df.to_csv(export_mismatch, index=False)
-only_hnau_df.to_csv(export_only_hnau, index=False)
-only_vs_df.to_csv(export_only_vs, index=False)
+for df, path in (
+    (mismatches_df, export_mismatch),
+    (only_hnau_df, export_only_hnau),
+    (only_vs_df, export_only_vs),
+):
+    write_csv(df, path)
 
 print(f"\nExports:")
 print(f" - Mismatches:   {export_mismatch}")
 print(f" - Only in HNAU: {export_only_hnau}")
 print(f" - Only in VS:   {export_only_vs}")
-print(f"\nSQLite DB: {db_path}")
+if export_sqlite:
+    print(f"\nSQLite DB: {db_path}")
@@ -19,6 +19,7 @@
 -- -----------------------------------------------------------------------------
 -- 0) (Optional) Start with a clean slate if re-running
 -- -----------------------------------------------------------------------------
+DROP VIEW IF EXISTS joined;
 DROP VIEW IF EXISTS hnau_norm;
 DROP VIEW IF EXISTS vs_norm;
 DROP TABLE IF EXISTS hnau_raw;
@@ -96,46 +97,36 @@ SELECT 'vs_norm_rows'   AS metric, COUNT(*) AS value FROM vs_norm;
 
 -- -----------------------------------------------------------------------------
 -- 4) Detailed mismatch report (emulated FULL OUTER JOIN)
+--    - One key set (UNION of both sides), each side LEFT JOINed once, so
+--      each normalized view is probed once per key instead of twice.
 --    - Includes:
 --       * ONLY_IN_HNAU (present only in hnau)
 --       * ONLY_IN_VS   (present only in vs)
 --       * QTY_MISMATCH (present in both but different qty)
 --       * MATCH        (present in both with same qty) -- filtered out below
 -- -----------------------------------------------------------------------------
-WITH joined AS (
-  -- Left side: all HNAU; mark status depending on VS presence/quantity
-  SELECT
-    h.sku                               AS sku,
-    h.qty                               AS hnau_qty,
-    v.qty                               AS vs_qty,
-    (COALESCE(v.qty, 0) - COALESCE(h.qty, 0)) AS qty_diff,
-    h.supplier_id                       AS supplier_id,
-    v.account                           AS account,
-    CASE
-      WHEN v.sku IS NULL THEN 'ONLY_IN_HNAU'
-      WHEN COALESCE(h.qty, 0) = COALESCE(v.qty, 0) THEN 'MATCH'
-      ELSE 'QTY_MISMATCH'
-    END                                 AS status
-  FROM hnau_norm h
-  LEFT JOIN vs_norm v
-    ON v.sku = h.sku
-
-  UNION ALL
-
-  -- Right-only rows: present in VS but not in HNAU
-  SELECT
-    v.sku                               AS sku,
-    h.qty                               AS hnau_qty,
-    v.qty                               AS vs_qty,
-    (COALESCE(v.qty, 0) - COALESCE(h.qty, 0)) AS qty_diff,
-    h.supplier_id                       AS supplier_id,
-    v.account                           AS account,
-    'ONLY_IN_VS'                        AS status
-  FROM vs_norm v
-  LEFT JOIN hnau_norm h
-    ON h.sku = v.sku
-  WHERE h.sku IS NULL
+CREATE VIEW joined AS
+WITH keys AS (
+  SELECT sku FROM hnau_norm
+  UNION
+  SELECT sku FROM vs_norm
 )
+SELECT
+  k.sku                               AS sku,
+  h.qty                               AS hnau_qty,
+  v.qty                               AS vs_qty,
+  (COALESCE(v.qty, 0) - COALESCE(h.qty, 0)) AS qty_diff,
+  h.supplier_id                       AS supplier_id,
+  v.account                           AS account,
+  CASE
+    WHEN v.sku IS NULL THEN 'ONLY_IN_HNAU'
+    WHEN h.sku IS NULL THEN 'ONLY_IN_VS'
+    WHEN COALESCE(h.qty, 0) = COALESCE(v.qty, 0) THEN 'MATCH'
+    ELSE 'QTY_MISMATCH'
+  END                                 AS status
+FROM keys k
+LEFT JOIN hnau_norm h ON h.sku = k.sku
+LEFT JOIN vs_norm v   ON v.sku = k.sku;
 
 -- Show only mismatches and existence differences
 SELECT *
@@ -146,38 +137,6 @@ ORDER BY status, sku;
 -- -----------------------------------------------------------------------------
 -- 5) Summary statistics
 -- -----------------------------------------------------------------------------
-WITH joined AS (
-  SELECT
-    h.sku                               AS sku,
-    h.qty                               AS hnau_qty,
-    v.qty                               AS vs_qty,
-    (COALESCE(v.qty, 0) - COALESCE(h.qty, 0)) AS qty_diff,
-    h.supplier_id                       AS supplier_id,
-    v.account                           AS account,
-    CASE
-      WHEN v.sku IS NULL THEN 'ONLY_IN_HNAU'
-      WHEN COALESCE(h.qty, 0) = COALESCE(v.qty, 0) THEN 'MATCH'
-      ELSE 'QTY_MISMATCH'
-    END                                 AS status
-  FROM hnau_norm h
-  LEFT JOIN vs_norm v
-    ON v.sku = h.sku
-
-  UNION ALL
-
-  SELECT
-    v.sku                               AS sku,
-    h.qty                               AS hnau_qty,
-    v.qty                               AS vs_qty,
-    (COALESCE(v.qty, 0) - COALESCE(h.qty, 0)) AS qty_diff,
-    h.supplier_id                       AS supplier_id,
-    v.account                           AS account,
-    'ONLY_IN_VS'                        AS status
-  FROM vs_norm v
-  LEFT JOIN hnau_norm h
-    ON h.sku = v.sku
-  WHERE h.sku IS NULL
-)
 SELECT
   (SELECT COUNT(*) FROM hnau_norm)                                                       AS hnau_rows,
   (SELECT COUNT(*) FROM vs_norm)                                                         AS vs_rows,
@@ -196,28 +155,6 @@ FROM joined;
 -- -----------------------------------------------------------------------------
 -- 6) (Optional) Top 50 largest quantity discrepancies
 -- -----------------------------------------------------------------------------
-WITH joined AS (
-  SELECT
-    h.sku AS sku, h.qty AS hnau_qty, v.qty AS vs_qty,
-    (COALESCE(v.qty, 0) - COALESCE(h.qty, 0)) AS qty_diff,
-    h.supplier_id, v.account,
-    CASE
-      WHEN v.sku IS NULL THEN 'ONLY_IN_HNAU'
-      WHEN COALESCE(h.qty, 0) = COALESCE(v.qty, 0) THEN 'MATCH'
-      ELSE 'QTY_MISMATCH'
-    END AS status
-  FROM hnau_norm h
-  LEFT JOIN vs_norm v ON v.sku = h.sku
-  UNION ALL
-  SELECT
-    v.sku AS sku, h.qty AS hnau_qty, v.qty AS vs_qty,
-    (COALESCE(v.qty, 0) - COALESCE(h.qty, 0)) AS qty_diff,
-    h.supplier_id, v.account,
-    'ONLY_IN_VS' AS status
-  FROM vs_norm v
-  LEFT JOIN hnau_norm h ON h.sku = v.sku
-  WHERE h.sku IS NULL
-)
 SELECT *
 FROM joined
 WHERE status = 'QTY_MISMATCH'
@@ -231,28 +168,6 @@ LIMIT 50;
 .mode csv
 .headers on
 .once ~/Downloads/stock_mismatches_29_08_2025.csv
-WITH joined AS (
-  SELECT
-    h.sku AS sku, h.qty AS hnau_qty, v.qty AS vs_qty,
-    (COALESCE(v.qty, 0) - COALESCE(h.qty, 0)) AS qty_diff,
-    h.supplier_id, v.account,
-    CASE
-      WHEN v.sku IS NULL THEN 'ONLY_IN_HNAU'
-      WHEN COALESCE(h.qty, 0) = COALESCE(v.qty, 0) THEN 'MATCH'
-      ELSE 'QTY_MISMATCH'
-    END AS status
-  FROM hnau_norm h
-  LEFT JOIN vs_norm v ON v.sku = h.sku
-  UNION ALL
-  SELECT
-    v.sku AS sku, h.qty AS hnau_qty, v.qty AS vs_qty,
-    (COALESCE(v.qty, 0) - COALESCE(h.qty, 0)) AS qty_diff,
-    h.supplier_id, v.account,
-    'ONLY_IN_VS' AS status
-  FROM vs_norm v
-  LEFT JOIN hnau_norm h ON h.sku = v.sku
-  WHERE h.sku IS NULL
-)
 SELECT *
 FROM joined
 WHERE status <> 'MATCH'
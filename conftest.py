@@ -0,0 +1,2 @@
+# Lets the tests under tests/ import the top-level scripts (pytest puts
+# this directory on sys.path because it holds a conftest.py).
@@ -1,17 +1,22 @@
+from collections import Counter
+
+import numpy as np
 import openpyxl
-from openpyxl.styles import Font, PatternFill
-from openpyxl.utils import get_column_letter
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill
 from openpyxl.workbook import Workbook
 
-wb = openpyxl.load_workbook('local_file_dir')
-ws = wb.active
+# Sheets are copied from the formula workbook so formulas survive; the
+# data_only copy (cached results) is only used to read the qty columns.
+src_wb = openpyxl.load_workbook('local_file_dir', read_only=True)
+values_wb = openpyxl.load_workbook('local_file_dir', read_only=True, data_only=True)
+ws = src_wb.active
 
-headers = [cell.value for cell in ws[1]]
+row_iter = ws.iter_rows(values_only=True)
+headers = list(next(row_iter, ()))
 if "StockStatus" not in headers:
-    ws.cell(row=1, column=len(headers)+1, value="StockStatus")
     headers.append("StockStatus")
 if "Validation" not in headers:
-    ws.cell(row=1, column=len(headers)+1, value="Validation")
     headers.append("Validation")
 
 col_qty_wh = headers.index("quantity_warehouse") + 1
@@ -21,68 +26,80 @@ col_validation = headers.index("Validation") + 1
 
 red_fill = PatternFill(start_color="FF9999", end_color="FF9999", fill_type="solid")
 
-for row in range(2, ws.max_row + 1):
-    qty_wh = ws.cell(row=row, column=col_qty_wh).value
-    qty_ec = ws.cell(row=row, column=col_qty_ec).value
-
-    if qty_wh is None or qty_ec is None:
-        status = "Missing data"
-    elif qty_wh <= 0 and qty_ec <= 0:
-        status = "Out of stock in both warehouse and ecommerce"
-    elif qty_wh <= 0:
-        status = "Stock available in ecommerce only"
-        ws.cell(row=row, column=col_stock_status).fill = red_fill
-    elif qty_ec <= 0:
-        status = "Stock available in warehouse only"
-        ws.cell(row=row, column=col_stock_status).fill = red_fill
-    else:
-        status = "Stock available in both warehouse and ecommerce"
-
-    ws.cell(row=row, column=col_stock_status, value=status)
-
-    if qty_wh < 0 or qty_ec < 0:
-        validation = "Check negative stock"
-        ws.cell(row=row, column=col_validation).fill = red_fill
-    else:
-        validation = "Stock Qty Data Type Validation PASS"
-
-    ws.cell(row=row, column=col_validation, value=validation)
-
-if "PivotTables" in wb.sheetnames:
-    pivot_ws = wb["PivotTables"]
-    wb.remove(pivot_ws)
-
-pivot_ws = wb.create_sheet("PivotTables")
+# Pivot keys highlighted in red.
+_ONLY_STATUSES = frozenset({"Stock available in ecommerce only", "Stock available in warehouse only"})
+_CHECK_VALIDATIONS = frozenset({"Check negative stock"})
+
+rows = [list(r) + [None] * (len(headers) - len(r)) for r in row_iter]
+
+def _qty(r, col):
+    v = r[col - 1] if col <= len(r) else None
+    return np.nan if v is None else v
+
+value_rows = list(values_wb.active.iter_rows(min_row=2, values_only=True))
+values_wb.close()
+qty_wh = np.array([_qty(r, col_qty_wh) for r in value_rows], dtype=float)
+qty_ec = np.array([_qty(r, col_qty_ec) for r in value_rows], dtype=float)
+
+missing = np.isnan(qty_wh) | np.isnan(qty_ec)
+wh_out = qty_wh <= 0
+ec_out = qty_ec <= 0
+status = np.select(
+    [missing, wh_out & ec_out, wh_out, ec_out],
+    [
+        "Missing data",
+        "Out of stock in both warehouse and ecommerce",
+        "Stock available in ecommerce only",
+        "Stock available in warehouse only",
+    ],
+    default="Stock available in both warehouse and ecommerce",
+)
+status_flag = ~missing & (wh_out ^ ec_out)
+negative = (qty_wh < 0) | (qty_ec < 0)
+validation = np.where(negative, "Check negative stock", "Stock Qty Data Type Validation PASS")
+
+wb = Workbook(write_only=True)
+
+def red_cell(sheet, value):
+    cell = WriteOnlyCell(sheet, value=value)
+    cell.fill = red_fill
+    return cell
 
-from collections import Counter
 status_counter = Counter()
 validation_counter = Counter()
 
-for row in range(2, ws.max_row + 1):
-    status = ws.cell(row=row, column=col_stock_status).value
-    validation = ws.cell(row=row, column=col_validation).value
-    status_counter[status] += 1
-    validation_counter[validation] += 1
+# Stream every sheet into the new workbook; the old pivot sheet is rebuilt below.
+for src_ws in src_wb.worksheets:
+    if src_ws.title == "PivotTables":
+        continue
+    out_ws = wb.create_sheet(src_ws.title)
+    if src_ws.title != ws.title:
+        for r in src_ws.iter_rows(values_only=True):
+            out_ws.append(r)
+        continue
+
+    out_ws.append(headers)
+    for r, st, val, flag, neg in zip(
+        rows, status.tolist(), validation.tolist(), status_flag.tolist(), negative.tolist()
+    ):
+        status_counter[st] += 1
+        validation_counter[val] += 1
+        r[col_stock_status - 1] = red_cell(out_ws, st) if flag else st
+        r[col_validation - 1] = red_cell(out_ws, val) if neg else val
+        out_ws.append(r)
+
+src_wb.close()
+
+pivot_ws = wb.create_sheet("PivotTables")
 
-pivot_ws.cell(row=1, column=1, value="StockStatus")
-pivot_ws.cell(row=1, column=2, value="Count")
-row_idx = 2
+pivot_ws.append(["StockStatus", "Count"])
 for key, count in status_counter.items():
-    pivot_ws.cell(row=row_idx, column=1, value=key)
-    pivot_ws.cell(row=row_idx, column=2, value=count)
-    if "only" in key:
-        pivot_ws.cell(row=row_idx, column=1).fill = red_fill
-    row_idx += 1
-
-pivot_ws.cell(row=row_idx + 1, column=1, value="Validation")
-pivot_ws.cell(row=row_idx + 1, column=2, value="Count")
-row_idx += 2
+    pivot_ws.append([red_cell(pivot_ws, key) if key in _ONLY_STATUSES else key, count])
+
+pivot_ws.append([])
+pivot_ws.append(["Validation", "Count"])
 for key, count in validation_counter.items():
-    pivot_ws.cell(row=row_idx, column=1, value=key)
-    pivot_ws.cell(row=row_idx, column=2, value=count)
-    if "Check" in key:
-        pivot_ws.cell(row=row_idx, column=1).fill = red_fill
-    row_idx += 1
+    pivot_ws.append([red_cell(pivot_ws, key) if key in _CHECK_VALIDATIONS else key, count])
 
 wb.save("Updated_Stock_Analysis.xlsx")
 print("Macro applied and pivot tables updated in 'Updated_Stock_Analysis.xlsx'.")
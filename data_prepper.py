@@ -1,18 +1,19 @@
 import pandas as pd
 import os
+import re
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from datetime import datetime
 import threading
 
-def normalize_to_snake_case(header):
-    temp = header.lower()
-    temp = temp.replace("[", "_").replace("]", "")
-    temp = temp.replace(" ", "_").replace("#", "number")
-    temp = temp.replace("-", "_").replace("/", "_").replace(".", "_")
-    while "__" in temp:
-        temp = temp.replace("__", "_")
-    return temp
+_SEPARATOR_RE = re.compile(r"[\[ \-/.]")
+_UNDERSCORES_RE = re.compile(r"_{2,}")
+
+def normalize_headers(headers):
+    cols = pd.Index(headers).map(str).str.lower()
+    cols = cols.str.replace("]", "", regex=False).str.replace("#", "number", regex=False)
+    cols = cols.str.replace(_SEPARATOR_RE, "_", regex=True)
+    return cols.str.replace(_UNDERSCORES_RE, "_", regex=True)
 
 class DataPrepperApp:
     def __init__(self, root):
@@ -21,6 +22,7 @@ class DataPrepperApp:
         self.file_path = ""
         self.sheet_names = []
         self.df = None
+        self._xls = None
 
         tk.Button(root, text="Select Excel or CSV File", command=self.select_file).pack(pady=10)
 
@@ -35,9 +37,13 @@ class DataPrepperApp:
 
         tk.Button(root, text="Preview and Select Columns", command=self.preview_data_threaded).pack(pady=10)
 
-        self.listbox = tk.Listbox(root, selectmode=tk.MULTIPLE, width=50)
+        self.listbox = tk.Listbox(root, selectmode=tk.MULTIPLE, width=50, exportselection=False)
         self.listbox.pack(pady=5)
 
+        tk.Label(root, text="Deduplicate on columns (optional):").pack()
+        self.dedup_listbox = tk.Listbox(root, selectmode=tk.MULTIPLE, width=50, height=6, exportselection=False)
+        self.dedup_listbox.pack(pady=5)
+
         tk.Button(root, text="Export to CSV", command=self.export_csv_threaded).pack(pady=10)
 
         self.status_label = tk.Label(root, text="", fg="blue")
@@ -54,11 +60,19 @@ class DataPrepperApp:
         ])
         if self.file_path:
             self.set_status("Loading file...")
+            if self._xls is not None:
+                self._xls.close()
             if self.file_path.endswith(".csv"):
+                self._xls = None
                 self.sheet_names = ["CSV"]
             else:
-                xls = pd.ExcelFile(self.file_path, engine="openpyxl")
-                self.sheet_names = xls.sheet_names
+                # Parsed once here; sheet switches reuse the open workbook.
+                # calamine (Rust) when python-calamine is installed, else pandas' default engine.
+                try:
+                    self._xls = pd.ExcelFile(self.file_path, engine="calamine")
+                except ImportError:
+                    self._xls = pd.ExcelFile(self.file_path)
+                self.sheet_names = self._xls.sheet_names
             self.sheet_dropdown["values"] = self.sheet_names
             self.sheet_var.set(self.sheet_names[0])
             self.set_status("File loaded.")
@@ -73,7 +87,7 @@ class DataPrepperApp:
             if sheet == "CSV":
                 self.df = pd.read_csv(self.file_path, header=None)
             else:
-                self.df = pd.read_excel(self.file_path, sheet_name=sheet, header=None, engine="openpyxl")
+                self.df = self._xls.parse(sheet_name=sheet, header=None)
             self.set_status("Sheet loaded.")
         except Exception as e:
             self.set_status("")
@@ -86,12 +100,16 @@ class DataPrepperApp:
         try:
             self.set_status("Processing preview...")
             header_row = int(self.header_entry.get()) - 1
-            self.df.columns = self.df.iloc[header_row]
+            self.df.columns = normalize_headers(self.df.iloc[header_row])
             self.df = self.df.drop(index=list(range(header_row + 1)))
-            self.df.columns = [normalize_to_snake_case(str(col)) for col in self.df.columns]
+            # Arrow-backed strings: far less memory than object columns, and
+            # drop_duplicates factorizes them with Arrow's hashing kernels.
+            self.df = self.df.astype("string[pyarrow]")
             self.listbox.delete(0, tk.END)
+            self.dedup_listbox.delete(0, tk.END)
             for col in self.df.columns:
                 self.listbox.insert(tk.END, col)
+                self.dedup_listbox.insert(tk.END, col)
             self.set_status("Preview ready.")
         except Exception as e:
             self.set_status("")
@@ -105,8 +123,13 @@ class DataPrepperApp:
             self.set_status("Exporting CSV...")
             selected_indices = self.listbox.curselection()
             selected_columns = [self.listbox.get(i) for i in selected_indices]
+            dedup_columns = [self.dedup_listbox.get(i) for i in self.dedup_listbox.curselection()]
+            dedup_columns = [c for c in dedup_columns if c in selected_columns]
             df_selected = self.df[selected_columns]
-            df_selected = df_selected.drop_duplicates()
+            if dedup_columns:
+                df_selected = df_selected.drop_duplicates(subset=dedup_columns, ignore_index=True)
+            else:
+                df_selected = df_selected.drop_duplicates(ignore_index=True)
             base_name = os.path.splitext(os.path.basename(self.file_path))[0]
             today = datetime.today().strftime("%d_%m_%Y")
             output_name = f"{base_name}_{today}_cleaned.csv"
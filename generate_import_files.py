@@ -2,28 +2,74 @@ import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import os
+import re
+import csv
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 
 # Default source codes
 DEFAULT_SOURCE_CODES = ['pos_337', 'src_virtualstock']
 
+# Bytes parsed per read block; memory stays bounded by this, not the file size.
+READ_BLOCK_BYTES = 8 << 20
+
+# Only files up to this size keep their parsed rows cached between passes;
+# larger files are re-streamed so memory stays bounded by READ_BLOCK_BYTES.
+ROWS_CACHE_MAX_BYTES = 64 << 20
+
+# Arrow's default null tokens plus the two extra ones pandas' read_csv treats as NaN.
+_NULL_VALUES = pacsv.ConvertOptions().null_values + ["None", "<NA>"]
+
+OUTPUT_FORMATS = ["CSV", "Parquet"]
+
+# Characters that make csv.writer quote a field (QUOTE_MINIMAL).
+_NEEDS_QUOTING = re.compile(r'[,"\r\n]')
+
+# SKU = text before the first '|', trimmed; equivalent to x.split('|')[0].strip().
+_SKU_HEAD = re.compile(r'^\s*([^|]*?)\s*(?:\||$)')
+
+# Fixed schema so every part file (and every row group) agrees on types.
+M2_SCHEMA = pa.schema([
+    ("sku", pa.string()),
+    ("stock_status", pa.int8()),
+    ("source_code", pa.dictionary(pa.int32(), pa.string())),
+    ("qty", pa.float64()),
+])
+
 class M2StockApp(tb.Window):
     def __init__(self):
         super().__init__(themename="darkly")
         self.title("M2 Stock Import CSV Generator")
         self.geometry("1200x700")
-        self.m2_df = None
+        self.preview_df = None
+        self.sku_status_df = None
         self.original_file_path = None
         self.source_codes = DEFAULT_SOURCE_CODES.copy()
         self.output_folder = os.path.expanduser("~/Desktop")
         self.chunk_size = 1000
+        self.output_format = tb.StringVar(value=OUTPUT_FORMATS[0])
         self.use_raw_sku = tb.BooleanVar(value=False)
         self.available_columns = []
         self.sku_column = tb.StringVar()
         self.qty_column = tb.StringVar()
+        self.work_q = queue.Queue()
+        self._worker = None
+        self._rows_cache = None
+        self._load_state = 'disabled'
+        self.preview_limit = 200
+        self._loaded_args = None
+        self._row_count = 0
+        self._preview_columns = None
 
         self.build_ui()
+        self.after(50, self._drain_queue)
 
     # def build_ui(self):
     #     # Sidebar for stats
@@ -169,8 +215,12 @@ class M2StockApp(tb.Window):
         self.entry_chunk_size = tb.Entry(tab_config, width=10)
         self.entry_chunk_size.insert(0, str(self.chunk_size))
         self.entry_chunk_size.grid(row=5, column=1, sticky=W)
+        format_box = tb.Combobox(tab_config, textvariable=self.output_format, values=OUTPUT_FORMATS, state="readonly", width=10)
+        format_box.grid(row=5, column=2, sticky=W, padx=10)
+        format_box.bind("<<ComboboxSelected>>", self.update_export_label)
 
-        tb.Button(tab_config, text="Export M2 CSV", bootstyle=SUCCESS, command=self.export_csv).grid(row=6, column=1, sticky=W, pady=20)
+        self.export_button = tb.Button(tab_config, text=f"Export M2 {self.output_format.get()}", bootstyle=SUCCESS, command=self.export_csv)
+        self.export_button.grid(row=6, column=1, sticky=W, pady=20)
 
         # Preview tab
         tab_preview = tb.Frame(notebook, padding=10)
@@ -214,8 +264,6 @@ class M2StockApp(tb.Window):
             self.entry_file_path.delete(0, 'end')
             self.entry_file_path.insert(0, file_path)
             self.original_file_path = file_path
-            self.dropdown_sku.bind("<<ComboboxSelected>>", self.check_column_selection)
-            self.dropdown_qty.bind("<<ComboboxSelected>>", self.check_column_selection)
             self.load_columns(file_path)
             self.after(100, lambda: self.process_csv(file_path))
 
@@ -242,17 +290,18 @@ class M2StockApp(tb.Window):
             messagebox.showwarning("Missing Info", "Please select file and both columns.")
             return
 
-        try:
-            df = pd.read_csv(file_path)
-            # Do something with df, sku_col, qty_col
-            self.stats_label.config(text=f"Loaded {len(df)} rows.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load data: {e}")
+        # The row count comes from the streaming pass; the file is never
+        # re-read just to count it.
+        if self._loaded_args == self._job_args(file_path)[:4]:
+            self.stats_label.config(text=f"Loaded {self._row_count} rows.")
+        else:
+            self.stats_label.config(text="Loading...")
+            self.process_csv(file_path)
 
     def load_columns(self, file_path):
         try:
-            df = pd.read_csv(file_path, nrows=1)
-            self.available_columns = list(df.columns)
+            # Header only: Arrow reads the schema without converting any rows.
+            self.available_columns = pacsv.open_csv(file_path).schema.names
 
             # Populate dropdowns with available columns
             self.dropdown_sku['values'] = self.available_columns
@@ -271,88 +320,301 @@ class M2StockApp(tb.Window):
         sku_selected = self.sku_column.get().strip()
         qty_selected = self.qty_column.get().strip()
 
-        if sku_selected and qty_selected:
-            self.load_button.config(state='normal')  # Enable the button
+        state = 'normal' if sku_selected and qty_selected else 'disabled'
+        if state != self._load_state:  # only touch the widget when it actually changes
+            self._load_state = state
+            self.load_button.config(state=state)
+
+    def update_export_label(self, *_):
+        self.export_button.config(text=f"Export M2 {self.output_format.get()}")
+
+    def _sku_rows(self, df, sku_col, qty_col, use_raw_sku):
+        """One (sku, stock_status, qty) row per input row, before the source-code fan-out."""
+        if use_raw_sku:
+            # Raw keys are used as-is: the parsed Arrow column is shared, not copied.
+            sku = df[sku_col]
         else:
-            self.load_button.config(state='disabled')  # Disable the button
+            # One regex pass in Arrow's string kernels instead of split + index + strip;
+            # missing SKUs stay missing.
+            sku = df[sku_col].str.extract(_SKU_HEAD, expand=False)
+
+        # float() semantics: blanks stay NaN, unparseable values become 0.
+        qty_num = pd.to_numeric(df[qty_col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        qty_val = np.where(np.isnan(qty_num) & df[qty_col].notna().to_numpy(), 0.0, qty_num)
+        return pd.DataFrame({
+            'sku': sku.array,
+            'stock_status': (qty_val > 0).astype(np.int8),
+            'qty': qty_val,
+        }, copy=False)
+
+    def _expand(self, rows, source_codes, start=0, stop=None):
+        """
+        Output rows start..stop of rows fanned out to one M2 row per source
+        code, row-major like the old loop. Only the requested rows are built,
+        so callers never slice (and re-index) a larger expanded frame.
+        """
+        s = len(source_codes)
+        stop = len(rows) * s if stop is None else stop
+        row_idx, src_idx = np.divmod(np.arange(start, stop), max(s, 1))
+        # Narrow dtypes throughout: Arrow-backed sku, int8 status and a
+        # dictionary-encoded source_code (small ints instead of str refs).
+        categories = list(dict.fromkeys(source_codes))
+        source_codes_idx = np.array([categories.index(c) for c in source_codes], dtype=np.int32)
+        return pd.DataFrame({
+            'sku': rows['sku'].array.take(row_idx),
+            'stock_status': rows['stock_status'].to_numpy()[row_idx],
+            'source_code': pd.Categorical.from_codes(source_codes_idx[src_idx], categories=categories),
+            'qty': rows['qty'].to_numpy()[row_idx],
+        })
+
+    def _csv_rows(self, piece):
+        """Plain Python rows for csv.writer; missing values become empty fields like to_csv."""
+        qty = piece['qty'].to_numpy()
+        return zip(
+            piece['sku'].array.to_numpy(dtype=object, na_value=None).tolist(),
+            piece['stock_status'].tolist(),
+            piece['source_code'].tolist(),
+            np.where(np.isnan(qty), None, qty).tolist(),
+        )
+
+    def _row_templates(self, categories):
+        """
+        One pre-built str.format per source code for the fixed 4-column schema,
+        with the code baked in. None when a code would need CSV quoting.
+        """
+        if any(_NEEDS_QUOTING.search(c) for c in categories):
+            return None
+        # Braces in a user-entered code are literal text, not format fields.
+        return [("{},{}," + c.replace("{", "{{").replace("}", "}}") + ",{}" + os.linesep).format
+                for c in categories]
+
+    def _iter_sku_rows(self, file_path, sku_col, qty_col, use_raw_sku):
+        """
+        Yield _sku_rows frames for file_path one read block at a time.
+        For files up to ROWS_CACHE_MAX_BYTES the narrow per-row frames from
+        the last full pass are cached, so the export after a preview doesn't
+        parse the file again.
+        """
+        stat = os.stat(file_path)
+        key = (file_path, stat.st_mtime_ns, stat.st_size, sku_col, qty_col, use_raw_sku)
+        cached = self._rows_cache
+        if cached is not None and cached[0] == key:
+            yield from cached[1]
+            return
 
+        columns = list(dict.fromkeys([sku_col, qty_col]))
+        reader = pacsv.open_csv(
+            file_path,
+            read_options=pacsv.ReadOptions(block_size=READ_BLOCK_BYTES, use_threads=True),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=columns,
+                column_types={c: pa.string() for c in columns},
+                strings_can_be_null=True,
+                null_values=_NULL_VALUES,
+            ),
+        )
+        frames = [] if stat.st_size <= ROWS_CACHE_MAX_BYTES else None
+        self._rows_cache = None
+        for batch in reader:
+            df = batch.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+            rows = self._sku_rows(df, sku_col, qty_col, use_raw_sku)
+            if frames is not None:
+                frames.append(rows)
+            yield rows
+        if frames is not None:
+            self._rows_cache = (key, frames)
+
+    def _job_args(self, file_path):
+        # Tk variables are read here, on the main thread; workers only get plain values.
+        return (file_path, self.sku_column.get(), self.qty_column.get(),
+                self.use_raw_sku.get(), list(self.source_codes))
+
+    def _start_worker(self, target, args):
+        if self._worker and self._worker.is_alive():
+            return False
+        self._load_state = 'disabled'
+        self.load_button.config(state='disabled')
+        self.export_button.config(state='disabled')
+        self._worker = threading.Thread(target=target, args=args, daemon=True)
+        self._worker.start()
+        return True
 
+    def _drain_queue(self):
+        try:
+            while True:
+                kind, payload = self.work_q.get_nowait()
+                if kind == 'preview':
+                    self.preview_df = payload
+                    self.preview_data(payload)
+                elif kind == 'stats':
+                    self._loaded_args, self._row_count, self.sku_status_df = payload
+                    self.update_stats()
+                elif kind == 'info':
+                    messagebox.showinfo("Success", payload)
+                elif kind == 'error':
+                    messagebox.showerror("Error", payload)
+                elif kind == 'done':
+                    self.export_button.config(state='normal')
+                    self.check_column_selection()
+        except queue.Empty:
+            pass
+        finally:
+            self.after(50, self._drain_queue)
 
     def process_csv(self, file_path):
-        try:
-            df = pd.read_csv(file_path)
-            sku_col = self.sku_column.get()
-            qty_col = self.qty_column.get()
+        sku_col = self.sku_column.get()
+        qty_col = self.qty_column.get()
 
-            if not sku_col or not qty_col:
-                # messagebox.showwarning("Warning", "Please select both SKU and Qty columns.")
-                return
+        if not sku_col or not qty_col:
+            # messagebox.showwarning("Warning", "Please select both SKU and Qty columns.")
+            return
+
+        self._start_worker(self._process_csv_worker, self._job_args(file_path))
 
-            if self.use_raw_sku.get():
-                df['sku'] = df[sku_col]
-            else:
-                df['sku'] = df[sku_col].apply(lambda x: x.split('|')[0].strip() if isinstance(x, str) else x)
-
-            m2_rows = []
-            for _, row in df.iterrows():
-                sku = row['sku']
-                qty = row[qty_col]
-                try:
-                    qty_val = float(qty)
-                    stock_status = 1 if qty_val > 0 else 0
-                except:
-                    qty_val = 0
-                    stock_status = 0
-
-                for source in self.source_codes:
-                    m2_rows.append({
-                        'sku': sku,
-                        'stock_status': stock_status,
-                        'source_code': source,
-                        'qty': qty_val
-                    })
-
-            self.m2_df = pd.DataFrame(m2_rows)
-            self.preview_data(self.m2_df.head(50))
-            self.update_stats()
+    def _process_csv_worker(self, file_path, sku_col, qty_col, use_raw_sku, source_codes):
+        try:
+            # Only the preview rows and the distinct (sku, stock_status) pairs
+            # are kept; the full output is regenerated by export_csv.
+            preview_parts = []
+            preview_rows = 0
+            row_count = 0
+            pairs = []
+            for rows in self._iter_sku_rows(file_path, sku_col, qty_col, use_raw_sku):
+                row_count += len(rows)
+                if preview_rows < self.preview_limit:
+                    need = self.preview_limit - preview_rows
+                    preview_parts.append(self._expand(rows, source_codes, 0, min(need, len(rows) * len(source_codes))))
+                    preview_rows += len(preview_parts[-1])
+                pairs.append(rows[['sku', 'stock_status']].drop_duplicates())
+            if preview_parts:
+                self.work_q.put(('preview', pd.concat(preview_parts, ignore_index=True)))
+            sku_status = pd.concat(pairs, ignore_index=True).drop_duplicates() if pairs else None
+            self.work_q.put(('stats', ((file_path, sku_col, qty_col, use_raw_sku), row_count, sku_status)))
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to process CSV: {e}")
+            self.work_q.put(('error', f"Failed to process CSV: {e}"))
+        finally:
+            self.work_q.put(('done', None))
 
     def preview_data(self, df):
-        for col in self.tree.get_children():
-            self.tree.delete(col)
-        self.tree["columns"] = list(df.columns)
-        self.tree["show"] = "headings"
-        for col in df.columns:
-            self.tree.heading(col, text=col)
-            self.tree.column(col, width=100)
-        for _, row in df.iterrows():
-            self.tree.insert("", "end", values=list(row))
+        self.tree.delete(*self.tree.get_children())
+        columns = list(df.columns)
+        if columns != self._preview_columns:
+            # Headings only need (re)configuring when the schema changes.
+            self._preview_columns = columns
+            self.tree.configure(columns=columns, displaycolumns='#all', show='headings')
+            for col in columns:
+                self.tree.heading(col, text=col)
+                self.tree.column(col, width=100)
+        # Box to Python objects once, rather than per cell inside iterrows;
+        # the Treeview isn't virtualized, so the row count is capped.
+        for values in df.head(self.preview_limit).astype(object).itertuples(index=False, name=None):
+            self.tree.insert("", "end", values=values)
 
     def update_stats(self):
-        if self.m2_df is not None:
-            total = len(self.m2_df['sku'].unique())
-            in_stock = self.m2_df[self.m2_df['stock_status'] == 1]['sku'].nunique()
-            out_stock = self.m2_df[self.m2_df['stock_status'] == 0]['sku'].nunique()
+        if self.sku_status_df is not None:
+            # Rows are distinct (sku, stock_status) pairs taken from the input rows,
+            # so a per-status count of non-null SKUs is that status' nunique.
+            pairs = self.sku_status_df
+            total = pairs['sku'].nunique(dropna=False)
+            status = pairs['stock_status'].to_numpy()[pairs['sku'].notna().to_numpy()]
+            out_stock, in_stock = np.bincount(status, minlength=2)[:2]
             sources = len(self.source_codes)
             self.stats_label.config(text=f"Stats:\n\nTotal SKUs: {total}\nIn Stock: {in_stock}\nOut of Stock: {out_stock}\nSource Codes: {sources}")
 
     def export_csv(self):
-        if self.m2_df is not None and self.original_file_path:
+        if self.preview_df is not None and self.original_file_path:
             try:
                 chunk_size = int(self.entry_chunk_size.get())
-                base_name = os.path.splitext(os.path.basename(self.original_file_path))[0]
-                for i in range(0, len(self.m2_df), chunk_size):
-                    chunk = self.m2_df.iloc[i:i+chunk_size]
-                    output_name = f"{base_name}_m2_import_part{i//chunk_size + 1}.csv"
-                    output_path = os.path.join(self.output_folder, output_name)
-                    chunk.to_csv(output_path, index=False)
-                messagebox.showinfo("Success", f"Exported to {self.output_folder}")
+                if chunk_size <= 0:
+                    raise ValueError("Chunk size must be a positive integer")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to export CSV: {e}")
+                return
+            self._start_worker(
+                self._export_csv_worker,
+                self._job_args(self.original_file_path) + (chunk_size, self.output_folder, self.output_format.get()),
+            )
         else:
             messagebox.showwarning("Warning", "No data to export")
 
+    def _iter_parts(self, file_path, sku_col, qty_col, use_raw_sku, source_codes, chunk_size):
+        """
+        Yield one list of M2 slices per part file (chunk_size rows, the last
+        may be short). Positions are in output rows (input row * source codes)
+        and only the slices being handed out are built.
+        """
+        s = len(source_codes)
+        pieces, rows_in_part = [], 0
+        for rows in self._iter_sku_rows(file_path, sku_col, qty_col, use_raw_sku):
+            total = len(rows) * s
+            start = 0
+            while start < total:
+                take = min(chunk_size - rows_in_part, total - start)
+                pieces.append(self._expand(rows, source_codes, start, start + take))
+                start += take
+                rows_in_part += take
+                if rows_in_part == chunk_size:
+                    yield pieces
+                    pieces, rows_in_part = [], 0
+        if pieces:
+            yield pieces
+
+    def _write_part(self, output_path, pieces, parquet):
+        if parquet:
+            with pq.ParquetWriter(output_path, M2_SCHEMA, compression='zstd') as writer:
+                for piece in pieces:
+                    writer.write_table(pa.Table.from_pandas(piece, schema=M2_SCHEMA, preserve_index=False))
+        else:
+            with open(output_path, 'w', newline='', encoding='utf-8') as fh:
+                writer = csv.writer(fh, lineterminator=os.linesep)
+                writer.writerow(M2_SCHEMA.names)
+                for piece in pieces:
+                    templates = self._row_templates(piece['source_code'].cat.categories)
+                    if templates is None or piece['sku'].str.contains(_NEEDS_QUOTING.pattern, regex=True).any():
+                        writer.writerows(self._csv_rows(piece))
+                        continue
+                    # Fast path: no field needs quoting, so each row is one template call.
+                    # Floats format like csv.writer (repr); missing values are ''.
+                    qty = piece['qty'].to_numpy()
+                    qty_obj = qty.astype(object)
+                    qty_obj[np.isnan(qty)] = ''
+                    fh.writelines([
+                        templates[code](sku, status, q)
+                        for code, sku, status, q in zip(
+                            piece['source_code'].cat.codes.tolist(),
+                            piece['sku'].array.to_numpy(dtype=object, na_value='').tolist(),
+                            piece['stock_status'].tolist(),
+                            qty_obj.tolist(),
+                        )
+                    ])
+
+    def _export_csv_worker(self, file_path, sku_col, qty_col, use_raw_sku, source_codes, chunk_size, output_folder, output_format):
+        try:
+            base_name = os.path.splitext(os.path.basename(file_path))[0]
+            parquet = output_format == "Parquet"
+            ext = "parquet" if parquet else "csv"
+            # Each part file is a separate path, so parts can be written
+            # concurrently; the in-flight window keeps memory bounded.
+            max_workers = min(4, os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=max_workers) as ex:
+                pending = set()
+                parts = self._iter_parts(file_path, sku_col, qty_col, use_raw_sku, source_codes, chunk_size)
+                for part, pieces in enumerate(parts, start=1):
+                    output_name = f"{base_name}_m2_import_part{part}.{ext}"
+                    output_path = os.path.join(output_folder, output_name)
+                    pending.add(ex.submit(self._write_part, output_path, pieces, parquet))
+                    if len(pending) >= 2 * max_workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for f in done:
+                            f.result()
+                for f in as_completed(pending):
+                    f.result()
+            self.work_q.put(('info', f"Exported to {output_folder}"))
+        except Exception as e:
+            self.work_q.put(('error', f"Failed to export CSV: {e}"))
+        finally:
+            self.work_q.put(('done', None))
+
 if __name__ == "__main__":
     app = M2StockApp()
     app.mainloop()
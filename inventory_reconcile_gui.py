@@ -6,26 +6,62 @@ Inventory Reconcile — HNAU vs VS (Minimal UI, Column-Pair Mapping)
 - First compare pair is the "quantity" for In/Out stats.
 - Save/Load JSON config.
 - Efficient on large CSVs: reads only keys + mapped columns.
+- Repeat compares read a <csv>.parquet sidecar instead of re-parsing the CSV.
 
-Deps: tkinter (stdlib), pandas, json (stdlib)
+Deps: tkinter (stdlib), pandas, numpy, pyarrow, json (stdlib)
 Run:  python inventory_reconcile_gui.py
 """
 from __future__ import annotations
 
 import os
 import json
-import queue
 import time
 import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from typing import Optional, Tuple, Dict, List
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from pandas.api.types import union_categoricals
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
+_ARROW_STRING = pd.ArrowDtype(pa.string())
+_ARROW_INT64 = pd.ArrowDtype(pa.int64())
+
+# Arrow's default null tokens plus the two extra ones pandas' read_csv treats as NaN.
+_NULL_VALUES = pacsv.ConvertOptions().null_values + ["None", "<NA>"]
+
+def read_csv_arrow(path: str, columns: List[str]) -> pa.Table:
+    """
+    Read `columns` as strings with Arrow's multithreaded block parser.
+    Rows with a wrong field count raise ArrowInvalid, so callers fall back to
+    pandas (which keeps them) instead of silently losing rows.
+    """
+    return pacsv.read_csv(
+        path,
+        read_options=pacsv.ReadOptions(block_size=8 << 20, use_threads=True),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=columns,
+            column_types={c: pa.string() for c in columns},
+            strings_can_be_null=True,
+            null_values=_NULL_VALUES,
+        ),
+    )
+
 def read_csv_smart(path: str, usecols: Optional[List[str]] = None, nrows: Optional[int] = None, dtype="string") -> pd.DataFrame:
+    if usecols and nrows is None and dtype == "string":
+        # Anything Arrow rejects (bad encoding, missing column) falls back below.
+        try:
+            return read_csv_arrow(path, usecols).to_pandas(types_mapper=pd.ArrowDtype)
+        except (pa.ArrowInvalid, pa.ArrowKeyError):
+            pass
     encodings = ["utf-8", "utf-8-sig", "latin-1"]
     last_err = None
     for enc in encodings:
@@ -35,6 +71,30 @@ def read_csv_smart(path: str, usecols: Optional[List[str]] = None, nrows: Option
             last_err = e
     raise RuntimeError(f"Failed to read CSV '{path}': {last_err}")
 
+def read_csv_cached(path: str, usecols: List[str]) -> pd.DataFrame:
+    """
+    Read `usecols` via a `<path>.parquet` sidecar. The sidecar holds every
+    column as strings and is rebuilt whenever the CSV is newer than it.
+    """
+    side = f"{path}.parquet"
+    try:
+        if os.path.getmtime(side) >= os.path.getmtime(path):
+            return pq.read_table(side, columns=usecols).to_pandas(types_mapper=pd.ArrowDtype)
+    except (OSError, pa.ArrowException, KeyError):
+        pass
+    try:
+        tbl = read_csv_arrow(path, pacsv.open_csv(path).schema.names)
+    except pa.ArrowException:
+        return read_csv_smart(path, usecols=usecols)
+    try:
+        tmp = side + ".tmp"
+        pq.write_table(tbl, tmp, compression="zstd")
+        os.replace(tmp, side)
+    except (OSError, pa.ArrowException):
+        pass
+    # Missing columns are left out here and reported by the caller.
+    return tbl.select([c for c in usecols if c in tbl.column_names]).to_pandas(types_mapper=pd.ArrowDtype)
+
 def parse_qty_to_int(x: object) -> int:
     if x is None or (isinstance(x, float) and pd.isna(x)):
         return 0
@@ -56,8 +116,26 @@ def parse_qty_to_int(x: object) -> int:
         except Exception:
             return 0
 
-def to_nullable_int_series(series: pd.Series) -> pd.Series:
-    return series.map(parse_qty_to_int).astype("Int64")
+def to_nullable_int_series(series: pd.Series, strict_decimal: bool = False) -> pd.Series:
+    # Column-level version of parse_qty_to_int (kept above as the scalar
+    # reference). Rounds half away from zero in float64 to match
+    # ROUND_HALF_UP; strict_decimal=True goes through Decimal per cell for
+    # values float64 can't hold exactly.
+    if strict_decimal:
+        return series.map(parse_qty_to_int).astype(_ARROW_INT64)
+    # No-op for the Arrow-backed reads; the string kernels then run in Arrow.
+    s = series.astype(_ARROW_STRING).str.strip().str.upper()
+    paren = s.str.startswith("(", na=False) & s.str.endswith(")", na=False)
+    s = s.str.slice(1, -1).where(paren, s).str.strip()
+    s = s.str.replace(",", "", regex=False)
+    s = s.mask(s.isin(["", "NULL", "NAN"]))
+    # Arrow-backed columns without nulls hand back a read-only view here, so
+    # replace non-finite values out of place rather than assigning into f.
+    f = pd.to_numeric(s, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    f = np.where(np.isfinite(f), f, 0.0)
+    i = (np.sign(f) * np.floor(np.abs(f) + 0.5)).astype(np.int64)
+    i = np.where(paren.to_numpy(dtype=bool), -i, i)
+    return pd.Series(i, index=series.index, dtype=_ARROW_INT64)
 
 # ---------------------------- Heuristics -------------------------------------
 
@@ -86,6 +164,17 @@ def guess_account_key(cols: List[str]) -> Optional[str]:
 
 # --------------------------- Diff / Compare engine ---------------------------
 
+def with_display_key(df: pd.DataFrame, kcols: List[str]) -> pd.DataFrame:
+    # "k0 | k1" label for output rows only, gathered from each categorical
+    # key's labels by code; the extra trailing "" label is what code -1 (NA)
+    # picks up.
+    key = None
+    for k in kcols:
+        labels = np.array([*df[k].cat.categories, ""], dtype=str)
+        part = labels[df[k].cat.codes.to_numpy()]
+        key = part if key is None else np.char.add(np.char.add(key, " | "), part)
+    return df.assign(key=pd.array(key, dtype=_ARROW_STRING))
+
 def compute_diff_pairs(
     df_src: pd.DataFrame,
     df_tgt: pd.DataFrame,
@@ -98,48 +187,81 @@ def compute_diff_pairs(
     if not compare_pairs:
         raise ValueError("Add at least one compare column pair.")
 
-    # Keep only required columns
+    # Keep only required columns, renamed in one pass to the unified join keys
+    # k{i} and canonical value names val{i}_src / val{i}_tgt. No defensive
+    # copy: the column selection is already a new frame.
+    kcols = [f"k{i}" for i in range(len(src_keys))]
     src_keep = list(dict.fromkeys([*src_keys, *[s for s, _ in compare_pairs]]))
     tgt_keep = list(dict.fromkeys([*tgt_keys, *[t for _, t in compare_pairs]]))
-    A = df_src[src_keep].copy()
-    B = df_tgt[tgt_keep].copy()
-
-    for s, t in compare_pairs:
-        if s in A: A[s] = to_nullable_int_series(A[s])
-        if t in B: B[t] = to_nullable_int_series(B[t])
-
-    # Unified join keys
-    kcols = [f"k{i}" for i in range(len(src_keys))]
-    A = A.rename(columns={src_keys[i]: kcols[i] for i in range(len(src_keys))})
-    B = B.rename(columns={tgt_keys[i]: kcols[i] for i in range(len(tgt_keys))})
-
-    # Canonical value names: val{i}_src / val{i}_tgt
-    val_src_names, val_tgt_names = {}, {}
-    for i, (s, t) in enumerate(compare_pairs):
-        val_src_names[s] = f"val{i}_src"
-        val_tgt_names[t] = f"val{i}_tgt"
-    A = A.rename(columns=val_src_names)
-    B = B.rename(columns=val_tgt_names)
-
-    merged = pd.merge(A, B, on=kcols, how="outer", indicator=True)
-    merged["key"] = merged[kcols].astype("string").fillna("").agg(" | ".join, axis=1)
-
-    # equal across all pairs
-    equal_all = pd.Series(True, index=merged.index)
-    for i, _ in enumerate(compare_pairs):
-        s = merged.get(f"val{i}_src")
-        t = merged.get(f"val{i}_tgt")
-        eq = (s.isna() & t.isna()) | (s.fillna(0) == t.fillna(0))
-        equal_all &= eq
-
-    only_src_mask = merged["_merge"].eq("left_only")
-    only_tgt_mask = merged["_merge"].eq("right_only")
-    both_mask     = merged["_merge"].eq("both")
-    mismatch_mask = both_mask & (~equal_all)
+    src_names = {s: f"val{i}_src" for i, (s, _) in enumerate(compare_pairs)}
+    tgt_names = {t: f"val{i}_tgt" for i, (_, t) in enumerate(compare_pairs)}
+    src_names.update(zip(src_keys, kcols))
+    tgt_names.update(zip(tgt_keys, kcols))
+    A = df_src[src_keep].rename(columns=src_names, copy=False)
+    B = df_tgt[tgt_keep].rename(columns=tgt_names, copy=False)
+
+    for i in range(len(compare_pairs)):
+        if f"val{i}_src" in A: A[f"val{i}_src"] = to_nullable_int_series(A[f"val{i}_src"])
+        if f"val{i}_tgt" in B: B[f"val{i}_tgt"] = to_nullable_int_series(B[f"val{i}_tgt"])
+
+    # Join on int codes from a shared sorted dictionary per key instead of
+    # hashing strings. Missing keys get the last code so the joins keep the
+    # same order (and NA-matches-NA behaviour) as the string join.
+    cats = {}
+    for k in kcols:
+        # Same category dtype on both sides even if one input came through
+        # the pandas fallback reader ('string' rather than string[pyarrow]).
+        A[k] = A[k].astype(_ARROW_STRING)
+        B[k] = B[k].astype(_ARROW_STRING)
+        cats[k] = union_categoricals(
+            [A[k].astype("category"), B[k].astype("category")], sort_categories=True
+        ).categories
+        na_code = len(cats[k])
+        for df in (A, B):
+            codes = pd.Categorical(df[k], categories=cats[k]).codes.astype(np.int32)
+            df[k] = np.where(codes < 0, na_code, codes)
+
+    # Inner join for matched keys, hashed anti-joins for the only-in sets, so
+    # unmatched rows never get a block of NaN columns from the other side.
+    # The per-key codes fold into one int64 key for the membership tests.
+    ka = np.zeros(len(A), dtype=np.int64)
+    kb = np.zeros(len(B), dtype=np.int64)
+    for k in kcols:
+        base = len(cats[k]) + 1
+        ka = ka * base + A[k].to_numpy(dtype=np.int64)
+        kb = kb * base + B[k].to_numpy(dtype=np.int64)
+    a_hit = pd.Index(ka).isin(kb)
+    b_hit = pd.Index(kb).isin(ka)
+
+    def decode(df: pd.DataFrame) -> pd.DataFrame:
+        return df.assign(**{
+            k: pd.Categorical.from_codes(
+                np.where(df[k].to_numpy() == len(cats[k]), -1, df[k].to_numpy()), categories=cats[k]
+            )
+            for k in kcols
+        })
+
+    # The inner join also runs on the folded key: one int64 column instead of
+    # factorizing and combining every key column again. Sorting by it orders
+    # rows by (k0, k1) codes, i.e. the same key order as before.
+    both = pd.merge(
+        A[a_hit].assign(_k=ka[a_hit]),
+        B[b_hit].drop(columns=kcols).assign(_k=kb[b_hit]),
+        on="_k", how="inner", sort=True,
+    )
+    both = decode(both.drop(columns="_k"))
+
+    # equal across all pairs (NA compares as 0, so NA == NA). Stacked per
+    # column: each int64[pyarrow] column converts straight to int64, where a
+    # frame-level to_numpy interleaves extension columns through object.
+    n_pairs = len(compare_pairs)
+    sv = np.column_stack([both[f"val{i}_src"].to_numpy(dtype=np.int64, na_value=0) for i in range(n_pairs)])
+    tv = np.column_stack([both[f"val{i}_tgt"].to_numpy(dtype=np.int64, na_value=0) for i in range(n_pairs)])
+    equal_all = (sv == tv).all(axis=1)
 
     # mismatches (human-friendly column labels)
     out_cols = ["key", "change"]
-    diff_df = merged[mismatch_mask].copy()
+    diff_df = with_display_key(both[~equal_all], kcols)
     diff_df.insert(0, "change", "modified")
     for i, (s_name, t_name) in enumerate(compare_pairs):
         diff_df[f"{s_name}_src"] = diff_df.get(f"val{i}_src")
@@ -148,27 +270,28 @@ def compute_diff_pairs(
     diff_df = diff_df.reindex(columns=out_cols)
 
     # only-in sets (show first pair where possible)
-    only_src = merged[only_src_mask].copy()
-    only_tgt = merged[only_tgt_mask].copy()
+    only_src = with_display_key(decode(A[~a_hit].sort_values(kcols, kind="stable", ignore_index=True)), kcols)
+    only_tgt = with_display_key(decode(B[~b_hit].sort_values(kcols, kind="stable", ignore_index=True)), kcols)
     s0, t0 = compare_pairs[0]
     src_cols = ["key"] + (["val0_src"] if "val0_src" in only_src else [])
     tgt_cols = ["key"] + (["val0_tgt"] if "val0_tgt" in only_tgt else [])
     only_src = only_src[src_cols].rename(columns={"val0_src": f"{s0}_src"})
     only_tgt = only_tgt[tgt_cols].rename(columns={"val0_tgt": f"{t0}_tgt"})
 
-    # In/Out sets (first pair as qty)
-    q_s = merged.get("val0_src").fillna(0)
-    q_t = merged.get("val0_tgt").fillna(0)
-    src_in_tgt_out = merged[both_mask & (q_s > 0) & (q_t <= 0)][["key", "val0_src", "val0_tgt"]]\
+    # In/Out sets (first pair as qty), classified on the int64 columns
+    # already stacked for the equality check (NA read as 0)
+    in_s = sv[:, 0] > 0
+    in_t = tv[:, 0] > 0
+    src_in_tgt_out = with_display_key(both[in_s & ~in_t], kcols)[["key", "val0_src", "val0_tgt"]]\
                      .rename(columns={"val0_src": f"{s0}_src", "val0_tgt": f"{t0}_tgt"})
-    tgt_in_src_out = merged[both_mask & (q_t > 0) & (q_s <= 0)][["key", "val0_src", "val0_tgt"]]\
+    tgt_in_src_out = with_display_key(both[in_t & ~in_s], kcols)[["key", "val0_src", "val0_tgt"]]\
                      .rename(columns={"val0_src": f"{s0}_src", "val0_tgt": f"{t0}_tgt"})
 
     stats = {
-        "added":   int(only_tgt_mask.sum()),
-        "removed": int(only_src_mask.sum()),
-        "modified": int(mismatch_mask.sum()),
-        "same":    int((both_mask & equal_all).sum()),
+        "added":   int(len(only_tgt)),
+        "removed": int(len(only_src)),
+        "modified": int(len(diff_df)),
+        "same":    int(equal_all.sum()),
         "hnau_in_vs_out": int(len(src_in_tgt_out)),
         "vs_in_hnau_out": int(len(tgt_in_src_out)),
         "hnau_rows": int(len(A)),
@@ -176,6 +299,34 @@ def compute_diff_pairs(
     }
     return diff_df, stats, only_src, only_tgt, src_in_tgt_out, tgt_in_src_out
 
+OUTPUT_FORMATS = ["CSV", "Parquet"]
+ROW_HEIGHT = 24
+
+def write_result_csv(df: pd.DataFrame, path: str) -> None:
+    # Arrow's chunked C++ writer with unquoted values so the file matches
+    # to_csv (Arrow's "needed" style still quotes every string); frames Arrow
+    # can't convert, or a value that needs quoting, go through to_csv.
+    try:
+        options = pacsv.WriteOptions(
+            batch_size=65536, quoting_style="none", quoting_header="none", eol=os.linesep,
+        )
+        pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path, write_options=options)
+        return
+    except (pa.ArrowException, TypeError):
+        pass
+    with open(path, "w", buffering=1 << 20, newline="", encoding="utf-8") as fh:
+        df.to_csv(fh, index=False, chunksize=65536)
+
+def write_result(df: pd.DataFrame, base_path: str, fmt: str) -> str:
+    """Write df as `<base_path>.csv` or `.parquet` (per fmt); returns the path."""
+    if fmt == "Parquet":
+        path = f"{base_path}.parquet"
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, compression="zstd", use_dictionary=True)
+    else:
+        path = f"{base_path}.csv"
+        write_result_csv(df, path)
+    return path
+
 def use_simple_theme(root: tk.Tk):
     style = ttk.Style(root)
 
@@ -192,7 +343,7 @@ def use_simple_theme(root: tk.Tk):
     style.map("TNotebook.Tab", background=[("selected", "#e0e0e0")])
 
     style.configure("Treeview",
-                    rowheight=24,
+                    rowheight=ROW_HEIGHT,
                     font=("Segoe UI", 9),
                     borderwidth=1,
                     relief="flat")
@@ -324,6 +475,7 @@ class KeysAndPairsDialog(tk.Toplevel):
 
 class App(tk.Tk):
     DEFAULT_CFG = "inventory_reconcile_config.json"
+    LOG_MAX_LINES = 5000
 
     def __init__(self):
         super().__init__()
@@ -335,6 +487,7 @@ class App(tk.Tk):
         self.src_path = tk.StringVar(value="")
         self.tgt_path = tk.StringVar(value="")
         self.export_dir = tk.StringVar(value=os.path.join(os.path.expanduser("~"), "Downloads"))
+        self.export_format = tk.StringVar(value=OUTPUT_FORMATS[0])
         self.mapping_state: Dict[str, object] = {
             "src_key1": None, "src_key2": None,
             "tgt_key1": None, "tgt_key2": None,
@@ -342,8 +495,14 @@ class App(tk.Tk):
         }
 
         self._result_frames: Dict[str, pd.DataFrame] = {}
-        self._log_q: "queue.Queue[str]" = queue.Queue()
-        self._worker: Optional[threading.Thread] = None
+        self._col_cache: Dict[Tuple[str, int], List[str]] = {}
+        # Bounded: if the GUI falls behind a chatty worker, the oldest lines go.
+        self._log_q: "deque[str]" = deque(maxlen=10_000)
+        self._log_lock = threading.Lock()
+        # One pool for the app's lifetime: runs the compare job and the
+        # input reads it fans out (>= 2 workers so those can't starve).
+        self._pool = ThreadPoolExecutor(max_workers=max(2, os.cpu_count() or 1))
+        self._job: Optional[Future] = None
 
         self._build_ui()
         self.after(120, self._drain_log_queue)
@@ -355,6 +514,10 @@ class App(tk.Tk):
             except Exception as e:
                 self._log(f"[WARN] Couldn't load default config: {e}")
 
+    def destroy(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        super().destroy()
+
     def _build_ui(self):
         self.columnconfigure(0, minsize=320)
         self.columnconfigure(1, weight=1)
@@ -390,10 +553,12 @@ class App(tk.Tk):
         fr_exp = ttk.Frame(side); fr_exp.pack(fill="x", pady=2)
         tk.Entry(fr_exp, textvariable=self.export_dir).pack(side="left", fill="x", expand=True)
         ttk.Button(fr_exp, text="Choose…", command=self._pick_export_dir).pack(side="left", padx=(6,0))
+        ttk.Label(side, text="Export Format").pack(anchor="w", pady=(6,0))
+        ttk.Combobox(side, textvariable=self.export_format, values=OUTPUT_FORMATS, state="readonly", width=10).pack(anchor="w", pady=2)
 
         ttk.Separator(side).pack(fill="x", pady=10)
         ttk.Button(side, text="Run Compare", command=self._run_compare).pack(fill="x")
-        ttk.Button(side, text="Export All CSVs", command=self._export_all, state="disabled").pack(fill="x", pady=(6,0))
+        ttk.Button(side, text="Export All", command=self._export_all, state="disabled").pack(fill="x", pady=(6,0))
         self.export_btn = side.pack_slaves()[-1]
 
     def _build_statsbar(self):
@@ -426,6 +591,9 @@ class App(tk.Tk):
         self.nb.grid(row=0, column=0, sticky="nsew")
 
         self.tables: Dict[str, ttk.Treeview] = {}
+        self._tab_frames: Dict[str, ttk.Frame] = {}
+        # Per-table render state: full frame, first visible row, v-scrollbar.
+        self._table_state: Dict[ttk.Treeview, dict] = {}
 
         tab_names = [
             "Mismatches",
@@ -455,10 +623,16 @@ class App(tk.Tk):
             cont.rowconfigure(0, weight=1)
             cont.columnconfigure(0, weight=1)
 
+            # Only the visible rows are ever inserted; the vertical scrollbar
+            # and mouse wheel page through the frame instead of the widget.
             tv = ttk.Treeview(cont, show="headings")
-            ys = ttk.Scrollbar(cont, orient="vertical", command=tv.yview)
+            ys = ttk.Scrollbar(cont, orient="vertical", command=lambda *a, t=tv: self._scroll_table(t, *a))
             xs = ttk.Scrollbar(cont, orient="horizontal", command=tv.xview)
-            tv.configure(yscrollcommand=ys.set, xscrollcommand=xs.set)
+            tv.configure(xscrollcommand=xs.set)
+            tv.bind("<Configure>", lambda e, t=tv: self._render_window(t))
+            tv.bind("<MouseWheel>", lambda e, t=tv: self._wheel_table(t, -1 if e.delta > 0 else 1))
+            tv.bind("<Button-4>", lambda e, t=tv: self._wheel_table(t, -1))
+            tv.bind("<Button-5>", lambda e, t=tv: self._wheel_table(t, 1))
 
             tv.grid(row=0, column=0, sticky="nsew")
             ys.grid(row=0, column=1, sticky="ns")
@@ -468,6 +642,8 @@ class App(tk.Tk):
 
             self.nb.add(frame, text=name)
             self.tables[name] = tv
+            self._tab_frames[name] = frame
+            self._table_state[tv] = {"df": None, "top": 0, "ys": ys}
 
 
     def _build_log(self):
@@ -502,8 +678,10 @@ class App(tk.Tk):
     def _peek_columns(self, path: str) -> List[str]:
         if not path or not os.path.exists(path):
             raise FileNotFoundError("Missing CSV path.")
-        df = read_csv_smart(path, nrows=0)
-        return list(df.columns)
+        key = (path, os.stat(path).st_mtime_ns)
+        if key not in self._col_cache:
+            self._col_cache[key] = list(read_csv_smart(path, nrows=0).columns)
+        return self._col_cache[key]
 
     def _load_config_dialog(self):
         p = filedialog.askopenfilename(title="Load Config", filetypes=[("JSON","*.json"),("All","*.*")])
@@ -538,6 +716,8 @@ class App(tk.Tk):
         self.src_path.set(paths.get("src_path", "") or self.src_path.get())
         self.tgt_path.set(paths.get("tgt_path", "") or self.tgt_path.get())
         self.export_dir.set(paths.get("export_dir", "") or self.export_dir.get())
+        if cfg.get("export_format") in OUTPUT_FORMATS:
+            self.export_format.set(cfg["export_format"])
 
     def _save_config(self, path: str):
         cfg = {
@@ -553,6 +733,7 @@ class App(tk.Tk):
                 "tgt_path": self.tgt_path.get(),
                 "export_dir": self.export_dir.get(),
             },
+            "export_format": self.export_format.get(),
             "saved_at": datetime.now().isoformat(timespec="seconds"),
         }
         with open(path, "w", encoding="utf-8") as f:
@@ -583,7 +764,7 @@ class App(tk.Tk):
             messagebox.showwarning("Columns", "Add at least one compare column pair.")
             return
 
-        if self._worker and self._worker.is_alive():
+        if self._job and not self._job.done():
             messagebox.showinfo("Busy", "A compare is already running.")
             return
 
@@ -591,16 +772,16 @@ class App(tk.Tk):
             pass
         self._result_frames.clear()
         self._log("Starting compare…")
-        self._worker = threading.Thread(target=self._do_compare, args=(src_keys, tgt_keys, pairs), daemon=True)
-        self._worker.start()
+        self._job = self._pool.submit(self._do_compare, src_keys, tgt_keys, pairs)
 
     def _do_compare(self, src_keys: List[str], tgt_keys: List[str], pairs: List[Tuple[str, str]]):
         t0 = time.time()
         try:
             src_need = list(dict.fromkeys([*src_keys, *[s for s,_ in pairs]]))
             tgt_need = list(dict.fromkeys([*tgt_keys, *[t for _,t in pairs]]))
-            src_df = read_csv_smart(self.src_path.get(), usecols=src_need)
-            tgt_df = read_csv_smart(self.tgt_path.get(), usecols=tgt_need)
+            fut_src = self._pool.submit(read_csv_cached, self.src_path.get(), src_need)
+            fut_tgt = self._pool.submit(read_csv_cached, self.tgt_path.get(), tgt_need)
+            src_df, tgt_df = fut_src.result(), fut_tgt.result()
 
             miss_src = [c for c in src_need if c not in src_df.columns]
             miss_tgt = [c for c in tgt_need if c not in tgt_df.columns]
@@ -645,32 +826,58 @@ class App(tk.Tk):
 
         for name, df in self._result_frames.items():
             self._populate_table(self.tables[name], df)
+            self.nb.tab(self._tab_frames[name], text=f"{name} ({len(df):,})")
 
     def _populate_table(self, tv: ttk.Treeview, df: pd.DataFrame):
-        for iid in tv.get_children(): tv.delete(iid)
+        tv.delete(*tv.get_children())
         cols = list(df.columns)
         tv["columns"] = cols
         for c in cols:
             tv.heading(c, text=c)
             tv.column(c, width=120, stretch=True)
 
-        lim = min(25000, len(df))
-        for i, (_, row) in enumerate(df.iloc[:lim].iterrows()):
-            def fmt(v):
-                try:
-                    if pd.isna(v): return ""
-                except Exception:
-                    pass
-                return str(v)
-            vals = [fmt(v) for v in row.values]
-            tag = "oddrow" if (i % 2) else ""
-            tv.insert("", "end", values=vals, tags=(tag,))
-
+        st = self._table_state[tv]
+        st["df"], st["top"] = df, 0
+        self._render_window(tv)
         self._autosize_columns(tv, df.head(200))
 
+    def _visible_rows(self, tv: ttk.Treeview) -> int:
+        return max(1, tv.winfo_height() // ROW_HEIGHT - 1)  # minus the heading
+
+    def _render_window(self, tv: ttk.Treeview):
+        st = self._table_state[tv]
+        df = st["df"]
+        if df is None:
+            return
+        n = self._visible_rows(tv)
+        top = st["top"] = max(0, min(st["top"], len(df) - n))
+        tv.delete(*tv.get_children())
+        # Stringify just the window column-wise (NA -> "") and insert tuples.
+        sub = df.iloc[top:top + n].astype("string").fillna("")
+        for i, values in enumerate(sub.itertuples(index=False, name=None), start=top):
+            tv.insert("", "end", values=values, tags=("oddrow",) if i & 1 else ())
+        total = max(len(df), 1)
+        st["ys"].set(top / total, min(1.0, (top + n) / total))
+
+    def _scroll_table(self, tv: ttk.Treeview, op: str, amount: str, unit: str = "units"):
+        st = self._table_state[tv]
+        if st["df"] is None:
+            return
+        if op == "moveto":
+            st["top"] = int(float(amount) * len(st["df"]))
+        else:
+            step = self._visible_rows(tv) if unit == "pages" else 1
+            st["top"] += int(amount) * step
+        self._render_window(tv)
+
+    def _wheel_table(self, tv: ttk.Treeview, direction: int):
+        self._scroll_table(tv, "scroll", str(direction * 3))
+        return "break"
+
     def _autosize_columns(self, tv: ttk.Treeview, sample: pd.DataFrame):
-        for i, col in enumerate(sample.columns):
-            w = max(len(str(col)), *(len(str(v)) for v in sample[col].astype("string").fillna("")))
+        for col in sample.columns:
+            w = sample[col].astype("string").str.len().max()
+            w = max(len(str(col)), 0 if pd.isna(w) else int(w))
             tv.column(col, width=max(80, min(300, (w + 2) * 7)))
 
     def _export_single(self, tab_name: str):
@@ -682,9 +889,8 @@ class App(tk.Tk):
         base = self.export_dir.get() or os.path.join(os.path.expanduser("~"), "Downloads")
         os.makedirs(base, exist_ok=True)
         safe = tab_name.lower().replace(" ", "_").replace("&", "and").replace("∧","and").replace("/","_")
-        path = os.path.join(base, f"{safe}_{tag}.csv")
         try:
-            df.to_csv(path, index=False)
+            path = write_result(df, os.path.join(base, f"{safe}_{tag}"), self.export_format.get())
             self._log(f"Exported {tab_name}: {path}")
             messagebox.showinfo("Export complete", f"Saved: {path}")
         except Exception as e:
@@ -697,31 +903,44 @@ class App(tk.Tk):
         tag = datetime.today().strftime('%d_%m_%Y')
         base = self.export_dir.get() or os.path.join(os.path.expanduser("~"), "Downloads")
         os.makedirs(base, exist_ok=True)
+        fmt = self.export_format.get()
+        # Frames are written concurrently on the app pool (the Arrow writers
+        # release the GIL); results are logged in tab order once all are done.
+        futures = {}
         for name, df in self._result_frames.items():
             safe = name.lower().replace(" ", "_").replace("&", "and").replace("∧","and").replace("/","_")
-            path = os.path.join(base, f"{safe}_{tag}.csv")
+            futures[name] = self._pool.submit(write_result, df, os.path.join(base, f"{safe}_{tag}"), fmt)
+        for name, fut in futures.items():
             try:
-                df.to_csv(path, index=False)
+                path = fut.result()
                 self._log(f"Exported: {path}")
             except Exception as e:
                 self._log(f"[ERROR] Failed to export {name}: {e}")
-        messagebox.showinfo("Export complete", f"CSV files saved to:\n{base}")
+        messagebox.showinfo("Export complete", f"{fmt} files saved to:\n{base}")
 
     def _log(self, msg: str):
-        ts = datetime.now().strftime("%H:%M:%S")
-        self._log_q.put(f"[{ts}] {msg}\n")
+        ts = time.strftime("%H:%M:%S")
+        with self._log_lock:
+            self._log_q.append(f"[{ts}] {msg}\n")
 
     def _drain_log_queue(self):
+        # Everything queued since the last tick goes in with one insert/see.
+        with self._log_lock:
+            lines = list(self._log_q)
+            self._log_q.clear()
         try:
-            while True:
-                line = self._log_q.get_nowait()
-                self.log_text.insert("end", line)
+            if lines:
+                self.log_text.insert("end", "".join(lines))
+                self._trim_log()
                 self.log_text.see("end")
-        except queue.Empty:
-            pass
         finally:
             self.after(150, self._drain_log_queue)
 
+    def _trim_log(self):
+        # Keep only the newest LOG_MAX_LINES lines in the widget.
+        if int(self.log_text.index("end-1c").split(".")[0]) > self.LOG_MAX_LINES:
+            self.log_text.delete("1.0", f"end-{self.LOG_MAX_LINES}l")
+
 def main():
     app = App()
     app.mainloop()
@@ -1,12 +1,22 @@
 import requests
-import base64
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
 import time
 import logging
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import json
 import os
 import csv
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 DEFAULT_SETTINGS = {
     "name": "default-router",
@@ -38,25 +48,45 @@ DEFAULT_SETTINGS = {
     "password": "your-password"
 }
 SETTINGS_FILE = "settings.json"
+_fetch_q = queue.Queue()
+def _json_loads(raw):
+    return orjson.loads(raw) if _HAS_ORJSON else json.loads(raw)
+def _settings_bytes(data):
+    if _HAS_ORJSON:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode("utf-8")
 def load_settings():
-    if os.path.exists(SETTINGS_FILE):
-        try:
-            with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-                settings = json.load(f)
-            for key, value in DEFAULT_SETTINGS.items():
-                if key not in settings:
-                    settings[key] = value
-            return settings
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load settings: {e}")
-            return DEFAULT_SETTINGS.copy()
-    else:
-        return DEFAULT_SETTINGS.copy()
+    try:
+        with open(SETTINGS_FILE, "rb") as f:
+            data = _json_loads(f.read())
+    except FileNotFoundError:
+        data = {}
+    except Exception as e:
+        messagebox.showerror("Error", f"Failed to load settings: {e}")
+        data = {}
+    # Single dict merges over the defaults; nested params/headers are merged
+    # into fresh dicts so edits never leak back into DEFAULT_SETTINGS.
+    return {
+        **DEFAULT_SETTINGS,
+        **data,
+        "params": {**DEFAULT_SETTINGS["params"], **(data.get("params") or {})},
+        "headers": {**DEFAULT_SETTINGS["headers"], **(data.get("headers") or {})},
+    }
 
 def save_settings():
+    global _saved_payload
+    payload = _settings_bytes(settings)
+    # Only rewrite when something changed; temp file + os.replace so an
+    # interrupted write never leaves a torn settings.json behind.
+    if payload == _saved_payload and os.path.exists(SETTINGS_FILE):
+        messagebox.showinfo("Success", "Settings unchanged.")
+        return
+    tmp = SETTINGS_FILE + ".tmp"
     try:
-        with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-            json.dump(settings, f, indent=4)
+        with open(tmp, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, SETTINGS_FILE)
+        _saved_payload = payload
         messagebox.showinfo("Success", "Settings saved successfully.")
     except Exception as e:
         messagebox.showerror("Error", f"Failed to save settings: {e}")
@@ -75,122 +105,226 @@ def create_labeled_spinbox(parent, label_text, row, from_, to, default_value):
     return spinbox
 def create_labeled_checkbox(parent, label_text, row, var):
     tk.Checkbutton(parent, text=label_text, variable=var).grid(row=row, column=0, columnspan=2, sticky="w")
+_EMPTY = {}
+_EMPTY_ITEMS = (_EMPTY,)
+_HEADER = (
+    "Order Reference", "Order Date", "Status", "Item Name", "Quantity", "Total",
+    "Shipping Full Name", "Address Line 1", "City", "State", "Postal Code", "Country"
+)
+def order_csv_row(order):
+    # Missing and empty items/shipping_address both fall through to _EMPTY.
+    item = (order.get("items") or _EMPTY_ITEMS)[0]
+    shipping = order.get("shipping_address") or _EMPTY
+    return (
+        order.get("order_reference", ""),
+        order.get("order_date", ""),
+        order.get("status", ""),
+        item.get("name", ""),
+        item.get("quantity", ""),
+        order.get("total", ""),
+        shipping.get("full_name", ""),
+        shipping.get("line_1", ""),
+        shipping.get("city", ""),
+        shipping.get("state", ""),
+        shipping.get("postal_code", ""),
+        shipping.get("country", "")
+    )
 def export_to_csv(orders, filename):
-    with open(filename, mode="w", newline="", encoding="utf-8") as file:
+    # 1 MiB file buffer; writerows drives the row generator from C.
+    with open(filename, mode="w", newline="", encoding="utf-8", buffering=1 << 20) as file:
         writer = csv.writer(file)
-        writer.writerow([
-            "Order Reference", "Order Date", "Status", "Item Name", "Quantity", "Total",
-            "Shipping Full Name", "Address Line 1", "City", "State", "Postal Code", "Country"
-        ])
-        for order in orders:
-            item = order["items"][0] if order["items"] else {}
-            shipping = order.get("shipping_address", {})
-            writer.writerow([
-                order.get("order_reference", ""),
-                order.get("order_date", ""),
-                order.get("status", ""),
-                item.get("name", ""),
-                item.get("quantity", ""),
-                order.get("total", ""),
-                shipping.get("full_name", ""),
-                shipping.get("line_1", ""),
-                shipping.get("city", ""),
-                shipping.get("state", ""),
-                shipping.get("postal_code", ""),
-                shipping.get("country", "")
-            ])
+        writer.writerow(_HEADER)
+        writer.writerows(map(order_csv_row, orders))
 def on_fetch_orders():
     part_number = part_entry.get().strip()
     if not part_number:
         messagebox.showerror("Error", "Please enter a part number.")
         return
     fetch_button.config(state="disabled")
-    root.update()
-    orders = fetch_all_orders(part_number)
+    progress_label.config(text=f"Fetching orders for {part_number}...")
+    # Network work runs on a worker thread; it only talks to Tk through
+    # _fetch_q, which _drain_fetch_queue polls from the event loop.
+    threading.Thread(target=_fetch_worker, args=(part_number,), daemon=True).start()
+    root.after(100, _drain_fetch_queue)
+def _fetch_worker(part_number):
+    try:
+        orders = fetch_all_orders(part_number, lambda msg: _fetch_q.put(("progress", msg)))
+    except Exception as e:
+        logging.error(f"Fetch failed: {e}")
+        _fetch_q.put(("error", str(e)))
+        return
+    _fetch_q.put(("done", (orders, list(client.failed_offsets))))
+def _drain_fetch_queue():
+    progress = None
+    try:
+        while True:
+            kind, payload = _fetch_q.get_nowait()
+            if kind == "progress":
+                progress = payload
+            elif kind == "error":
+                progress_label.config(text=f"Fetch failed: {payload}")
+                fetch_button.config(state="normal")
+                return
+            else:
+                _finish_fetch(payload)
+                return
+    except queue.Empty:
+        pass
+    # Only the newest progress line is worth painting.
+    if progress is not None:
+        progress_label.config(text=progress)
+    root.after(100, _drain_fetch_queue)
+def _finish_fetch(result):
+    orders, failed = result
     total_orders = len(orders)
     total_value = sum(float(order.get("total", 0)) for order in orders)
-    progress_label.config(text=f"Total Orders: {total_orders} | Total Value: ${total_value:.2f}")
+    summary = f"Total Orders: {total_orders} | Total Value: ${total_value:.2f}"
+    if failed:
+        summary += f" | {len(failed)} page(s) failed"
+    progress_label.config(text=summary)
+    if failed and not messagebox.askyesno(
+        "Incomplete Fetch",
+        f"{len(failed)} page(s) failed after retries (offsets: {', '.join(map(str, failed))}).\n"
+        "Export the incomplete results anyway?"
+    ):
+        fetch_button.config(state="normal")
+        return
     file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
     if file_path:
         export_to_csv(orders, file_path)
         messagebox.showinfo("Success", f"Orders exported to {file_path}")
     fetch_button.config(state="normal")
-def fetch_all_orders(part_number):
-    client = APIClient(settings)
-    all_orders = []
-    offset = 0
-    limit = settings["params"].get("limit", 10)
-    batch_size = settings.get("batch_size", 10)
-    while True:
-        settings["params"]["part_number"] = part_number
-        settings["params"]["offset"] = offset
-        settings["params"]["limit"] = limit
-        orders_batch = client.fetch_paginated_data(lambda msg: progress_label.config(text=msg))
-        if not orders_batch:
-            break
-        all_orders.extend(orders_batch)
-        if len(orders_batch) < batch_size:
-            break
-        offset += batch_size
-    return all_orders
+def fetch_all_orders(part_number, progress_callback=None):
+    # Per-call params only; settings["params"] is never mutated.
+    return client.fetch_paginated_data(
+        {"part_number": part_number, "offset": 0},
+        progress_callback,
+    )
 class APIClient:
     def __init__(self, settings):
         self.settings = settings
         self.session = requests.Session()
+        self._pace_lock = threading.Lock()
+        self._next_slot = 0.0
+        self._delay = 0
+        self.failed_offsets = []
         self._configure_session()
 
     def _configure_session(self):
         headers = self.settings.get("headers", {})
-        auth_string = f"{self.settings['username']}:{self.settings['password']}"
-        auth_header = base64.b64encode(auth_string.encode()).decode()
-        headers["Authorization"] = f"Basic {auth_header}"
+        # Credentials go on session.auth, not into settings["headers"] (which
+        # is saved to settings.json); drop any header left there by older runs.
+        headers.pop("Authorization", None)
+        self.session.headers.pop("Authorization", None)
         self.session.headers.update(headers)
-    def fetch_paginated_data(self, progress_callback=None):
-        offset = int(self.settings["params"].get("offset", 0))
-        all_results = []
-        total_count = None
+        self.session.auth = HTTPBasicAuth(self.settings["username"], self.settings["password"])
+        # Pooled keep-alive connections; urllib3 retries 429/5xx with backoff
+        # (honouring Retry-After) and hands back the last response when done.
+        retry_options = dict(
+            # max_retries counts attempts (as it always has); Retry counts
+            # retries after the first one.
+            total=max(0, int(self.settings.get("max_retries", 3)) - 1),
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "POST"]),
+            raise_on_status=False,
+        )
+        try:
+            # Jitter keeps concurrent page workers from retrying in lockstep
+            # after a shared 503 (backoff_jitter needs urllib3 >= 2.0).
+            retry = Retry(backoff_jitter=0.5, **retry_options)
+        except TypeError:
+            retry = Retry(**retry_options)
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+    def _wait_turn(self):
+        # Shared pacing for all page workers: requests start at least
+        # 60/requests_per_minute seconds apart, however many run at once.
+        if not self._delay:
+            return
+        with self._pace_lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot)
+            self._next_slot = start + self._delay
+        if start > now:
+            time.sleep(start - now)
+    def _fetch_page(self, offset, base_params, request_kwargs):
+        """Fetch one page; returns the decoded JSON, or None on failure."""
+        self._wait_turn()
+        try:
+            response = self.session.request(
+                params={**base_params, "offset": str(offset)},
+                **request_kwargs
+            )
+            if response.status_code != 200:
+                logging.error(f"Failed with status {response.status_code} at offset {offset}")
+                return None
+            # Decode the raw body directly; skips requests' charset sniffing.
+            data = _json_loads(response.content)
+        except Exception as e:
+            logging.error(f"Exception at offset {offset}: {e}")
+            return None
+        logging.info(f"Fetched {len(data.get('results', []))} items at offset {offset}")
+        return data
+    def fetch_paginated_data(self, params=None, progress_callback=None):
+        # The first page carries the total count, so every remaining offset
+        # is known up front and fetched concurrently over the pooled session.
+        # Settings are read once here; workers share the read-only copies.
+        base_params = {**(self.settings.get("params") or {}), **(params or {})}
+        start = int(base_params.pop("offset", 0) or 0)
+        request_kwargs = {
+            "method": self.settings.get("method", "GET"),
+            "url": self.settings.get("url"),
+            "timeout": self.settings.get("timeout", 10),
+            "allow_redirects": self.settings.get("allow_redirects", True),
+            "verify": self.settings.get("verify", True),
+        }
         rpm = int(self.settings.get("requests_per_minute", 60))
-        delay = 60 / rpm if self.settings.get("rate_limit_enabled", False) else 0
-        batch_size = self.settings.get("batch_size", 10)
-        max_retries = self.settings.get("max_retries", 3)
-        while True:
-            self.settings["params"]["offset"] = str(offset)
-            for attempt in range(max_retries):
-                try:
-                    if progress_callback:
-                        progress_callback(f"Fetching offset {offset}...")
-                    response = self.session.request(
-                        method=self.settings.get("method", "GET"),
-                        url=self.settings.get("url"),
-                        params=self.settings.get("params"),
-                        timeout=self.settings.get("timeout", 10),
-                        allow_redirects=self.settings.get("allow_redirects", True),
-                        verify=self.settings.get("verify", True)
-                    )
-                    if response.status_code == 200:
-                        data = response.json()
-                        if total_count is None:
-                            total_count = data.get("count", 0)
-                        batch = data.get("results", [])
-                        all_results.extend(batch)
-                        logging.info(f"Fetched {len(batch)} items at offset {offset}")
-                        break
-                    else:
-                        logging.warning(f"Failed with status {response.status_code} at offset {offset}")
-                        time.sleep(2 ** attempt)
-                except Exception as e:
-                    logging.error(f"Exception at offset {offset}: {e}")
-                    time.sleep(2 ** attempt)
-            else:
-                logging.error(f"Max retries exceeded at offset {offset}")
-                break
-
-            if len(batch) < batch_size:
-                break
-            offset += batch_size
-            if delay:
-                time.sleep(delay)
-        return all_results
+        self._delay = 60 / rpm if self.settings.get("rate_limit_enabled", False) else 0
+        self._next_slot = 0.0
+        # Offsets whose page still failed after retries; callers check this
+        # so a gap in the results is never reported as a complete fetch.
+        self.failed_offsets = []
+        if progress_callback:
+            progress_callback(f"Fetching offset {start}...")
+        first = self._fetch_page(start, base_params, request_kwargs)
+        if first is None:
+            self.failed_offsets = [start]
+            return []
+        pages = {start: first.get("results", [])}
+        # Step by the page size the server actually returned (it may cap
+        # "limit"), so offsets neither overlap nor skip rows; count decides
+        # whether any pages remain.
+        step = len(pages[start])
+        if not step:
+            return pages[start]
+        if first.get("count") is None:
+            # No total to plan from: page one at a time until a short batch.
+            offset, batch = start + step, pages[start]
+            while len(batch) >= step:
+                if progress_callback:
+                    progress_callback(f"Fetching offset {offset}...")
+                data = self._fetch_page(offset, base_params, request_kwargs)
+                if data is None:
+                    self.failed_offsets.append(offset)
+                    break
+                batch = pages[offset] = data.get("results", [])
+                offset += len(batch)
+            return [order for offset in sorted(pages) for order in pages[offset]]
+        offsets = range(start + step, int(first["count"]), step)
+        with ThreadPoolExecutor(max_workers=min(8, rpm // 10 or 4)) as pool:
+            futures = {pool.submit(self._fetch_page, offset, base_params, request_kwargs): offset for offset in offsets}
+            for done, future in enumerate(as_completed(futures), 1):
+                data = future.result()
+                if data is not None:
+                    pages[futures[future]] = data.get("results", [])
+                else:
+                    self.failed_offsets.append(futures[future])
+                if progress_callback:
+                    progress_callback(f"Fetched {done}/{len(futures)} pages...")
+        self.failed_offsets.sort()
+        return [order for offset in sorted(pages) for order in pages[offset]]
 root = tk.Tk()
 root.title("API Router Settings Editor")
 root.geometry("600x800")
@@ -201,68 +335,76 @@ notebook.add(settings_tab, text="Settings")
 fetch_tab = ttk.Frame(notebook)
 notebook.add(fetch_tab, text="Fetch Orders")
 settings = load_settings()
-name_entry = create_labeled_entry(settings_tab, "Name:", 0, settings["name"])
-method_entry = create_labeled_entry(settings_tab, "Method:", 1, settings["method"])
-url_entry = create_labeled_entry(settings_tab, "URL:", 2, settings["url"])
-limit_spin = create_labeled_spinbox(settings_tab, "Limit:", 3, 1, 1000, settings["params"]["limit"])
-offset_spin = create_labeled_spinbox(settings_tab, "Offset:", 4, 0, 1000, settings["params"]["offset"])
-part_entry = create_labeled_entry(settings_tab, "Part Number:", 5, settings["params"]["part_number"])
-content_type_entry = create_labeled_entry(settings_tab, "Content-Type:", 6, settings["headers"]["Content-Type"])
-accept_entry = create_labeled_entry(settings_tab, "Accept:", 7, settings["headers"]["Accept"])
-body_mode_entry = create_labeled_entry(settings_tab, "Body Mode:", 8, settings["body_mode"])
-body_entry = create_labeled_entry(settings_tab, "Body (JSON):", 9, json.dumps(settings["body"]))
-timeout_spin = create_labeled_spinbox(settings_tab, "Timeout:", 10, 1, 60, settings["timeout"])
-sort_var = tk.BooleanVar(value=settings["sort_enabled"])
-create_labeled_checkbox(settings_tab, "Enable Sorting", 11, sort_var)
-sort_entry = create_labeled_entry(settings_tab, "Sort Order:", 12, settings["sort"])
-status_var = tk.BooleanVar(value=settings["status_enabled"])
-create_labeled_checkbox(settings_tab, "Enable Status Filter", 13, status_var)
-status_entry = create_labeled_entry(settings_tab, "Status:", 14, settings["status"])
-rate_var = tk.BooleanVar(value=settings["rate_limit_enabled"])
-create_labeled_checkbox(settings_tab, "Enable Rate Limiting", 15, rate_var)
-rate_spin = create_labeled_spinbox(settings_tab, "Requests/Minute:", 16, 1, 1000, settings["requests_per_minute"])
-batch_spin = create_labeled_spinbox(settings_tab, "Batch Size:", 17, 1, 100, settings["batch_size"])
-retry_spin = create_labeled_spinbox(settings_tab, "Max Retries:", 18, 1, 10, settings["max_retries"])
-allow_var = tk.BooleanVar(value=settings["allow_redirects"])
-create_labeled_checkbox(settings_tab, "Allow Redirects", 19, allow_var)
-verify_var = tk.BooleanVar(value=settings["verify"])
-create_labeled_checkbox(settings_tab, "Verify SSL", 20, verify_var)
-user_entry = create_labeled_entry(settings_tab, "Username:", 21, settings["username"])
-pass_entry = create_labeled_entry(settings_tab, "Password:", 22, settings["password"])
+_saved_payload = _settings_bytes(settings)
+# (settings path, label, kind[, spin from, spin to]); the row is the index.
+SETTINGS_FIELDS = [
+    ("name", "Name:", "entry"),
+    ("method", "Method:", "entry"),
+    ("url", "URL:", "entry"),
+    ("params.limit", "Limit:", "spin", 1, 1000),
+    ("params.offset", "Offset:", "spin", 0, 1000),
+    ("params.part_number", "Part Number:", "entry"),
+    ("headers.Content-Type", "Content-Type:", "entry"),
+    ("headers.Accept", "Accept:", "entry"),
+    ("body_mode", "Body Mode:", "entry"),
+    ("body", "Body (JSON):", "json"),
+    ("timeout", "Timeout:", "spin", 1, 60),
+    ("sort_enabled", "Enable Sorting", "check"),
+    ("sort", "Sort Order:", "entry"),
+    ("status_enabled", "Enable Status Filter", "check"),
+    ("status", "Status:", "entry"),
+    ("rate_limit_enabled", "Enable Rate Limiting", "check"),
+    ("requests_per_minute", "Requests/Minute:", "spin", 1, 1000),
+    ("batch_size", "Batch Size:", "spin", 1, 100),
+    ("max_retries", "Max Retries:", "spin", 1, 10),
+    ("allow_redirects", "Allow Redirects", "check"),
+    ("verify", "Verify SSL", "check"),
+    ("username", "Username:", "entry"),
+    ("password", "Password:", "entry"),
+]
+def _settings_slot(path):
+    *parents, key = path.split(".")
+    container = settings
+    for parent in parents:
+        container = container[parent]
+    return container, key
+widgets = {}
+for row, (path, label, kind, *spin_range) in enumerate(SETTINGS_FIELDS):
+    container, key = _settings_slot(path)
+    value = container[key]
+    if kind == "check":
+        widget = tk.BooleanVar(value=value)
+        create_labeled_checkbox(settings_tab, label, row, widget)
+    elif kind == "spin":
+        widget = create_labeled_spinbox(settings_tab, label, row, *spin_range, value)
+    else:
+        widget = create_labeled_entry(settings_tab, label, row, json.dumps(value) if kind == "json" else value)
+    widgets[path] = (kind, widget)
+part_entry = widgets["params.part_number"][1]
 client = APIClient(settings)
 fetch_button = ttk.Button(fetch_tab, text="Fetch Orders", command=on_fetch_orders)
 fetch_button.pack(pady=10)
 def on_save():
-    settings["name"] = name_entry.get()
-    settings["method"] = method_entry.get()
-    settings["url"] = url_entry.get()
-    settings["params"]["limit"] = int(limit_spin.get())
-    settings["params"]["offset"] = int(offset_spin.get())
-    settings["params"]["part_number"] = part_entry.get()
-    settings["headers"]["Content-Type"] = content_type_entry.get()
-    settings["headers"]["Accept"] = accept_entry.get()
-    settings["body_mode"] = body_mode_entry.get()
-    try:
-        settings["body"] = json.loads(body_entry.get())
-    except json.JSONDecodeError:
-        messagebox.showerror("Error", "Body must be valid JSON.")
-        return
-    settings["timeout"] = int(timeout_spin.get())
-    settings["sort_enabled"] = sort_var.get()
-    settings["sort"] = sort_entry.get()
-    settings["status_enabled"] = status_var.get()
-    settings["status"] = status_entry.get()
-    settings["rate_limit_enabled"] = rate_var.get()
-    settings["requests_per_minute"] = int(rate_spin.get())
-    settings["batch_size"] = int(batch_spin.get())
-    settings["max_retries"] = int(retry_spin.get())
-    settings["allow_redirects"] = allow_var.get()
-    settings["verify"] = verify_var.get()
-    settings["username"] = user_entry.get()
-    settings["password"] = pass_entry.get()
+    # Read and validate every field before touching settings.
+    values = {}
+    for path, (kind, widget) in widgets.items():
+        value = widget.get()
+        if kind == "spin":
+            value = int(value)
+        elif kind == "json":
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError:
+                messagebox.showerror("Error", "Body must be valid JSON.")
+                return
+        values[path] = value
+    for path, value in values.items():
+        container, key = _settings_slot(path)
+        container[key] = value
+    client._configure_session()
     save_settings()
 save_button = ttk.Button(settings_tab, text="Save Settings", command=on_save)
-save_button.grid(row=23, column=0, columnspan=2, pady=10)
+save_button.grid(row=len(SETTINGS_FIELDS), column=0, columnspan=2, pady=10)
 progress_label = tk.Label(fetch_tab, text="Click to fetch orders using settings.json")
 progress_label.pack(pady=10)
 root.mainloop()
@@ -20,22 +20,76 @@ DARK_THEME = {
 
 current_theme = LIGHT_THEME
 
+_PHP_PAIR_RE = re.compile(rb's:\d+:"(.*?)";s:\d+:"(.*?)";', re.DOTALL)
+_BAD_VALUE = ('a:', 'i:', 'b:', 'N')
+_BAD_KEY = ('";',) + _BAD_VALUE
+
+def read_php_string(buf, pos):
+    """Parse s:N:"...";  at buf[pos]; returns (bytes, end) or None."""
+    if not buf.startswith(b's:', pos):
+        return None
+    quote = buf.find(b':"', pos + 2)
+    digits = buf[pos + 2:quote]
+    if quote < 0 or not digits.isdigit():
+        return None
+    start = quote + 2
+    end = start + int(digits)
+    if buf[end:end + 2] != b'";':
+        return None
+    return buf[start:end], end + 2
+
+def iter_php_pairs(buf):
+    """
+    Yield (key, value) bytes for every s:..;s:..; pair in buf, scanning like
+    _PHP_PAIR_RE.finditer. At each match the N length prefixes (byte counts)
+    are tried first, so values containing '";' are sliced exactly; where a
+    prefix doesn't fit (hand-edited text, a nested a:{...} value) that match's
+    pattern groups are used instead, as before.
+    """
+    pos = 0
+    while True:
+        m = _PHP_PAIR_RE.search(buf, pos)
+        if m is None:
+            return
+        key = read_php_string(buf, m.start())
+        value = key and read_php_string(buf, key[1])
+        if value:
+            yield key[0], value[0]
+            pos = value[1]
+        else:
+            yield m.groups()
+            pos = m.end()
+
+def php_to_dict(text):
+    """Flat {key: value} of the string pairs in PHP-serialized text."""
+    data_dict = {}
+    for k, v in iter_php_pairs(text.encode("utf-8")):
+        key, value = k.decode("utf-8", "replace"), v.decode("utf-8", "replace")
+        if not any(x in key for x in _BAD_KEY) and not any(x in value for x in _BAD_VALUE):
+            data_dict[key] = value
+    return data_dict
+
+# Theme key used for each option, per widget role.
+_ROLE_OPTIONS = {
+    "frame": {"bg": "bg"},
+    "label": {"bg": "bg", "fg": "fg"},
+    "button": {"bg": "button_bg", "fg": "fg"},
+    "text": {"bg": "entry_bg", "fg": "fg"},
+}
+# (widget, role) pairs registered at construction; apply_theme walks this
+# flat list instead of recursing through winfo_children().
+_themed = []
+
+def themed(widget, role):
+    _themed.append((widget, role))
+    return widget
+
 def apply_theme():
     root.configure(bg=current_theme["bg"])
-    for widget in root.winfo_children():
-        apply_widget_theme(widget)
-
-def apply_widget_theme(widget):
-    if isinstance(widget, tk.Frame):
-        widget.configure(bg=current_theme["bg"])
-        for child in widget.winfo_children():
-            apply_widget_theme(child)
-    elif isinstance(widget, tk.Label):
-        widget.configure(bg=current_theme["bg"], fg=current_theme["fg"])
-    elif isinstance(widget, tk.Button):
-        widget.configure(bg=current_theme["button_bg"], fg=current_theme["fg"])
-    elif isinstance(widget, tk.Text):
-        widget.configure(bg=current_theme["entry_bg"], fg=current_theme["fg"])
+    cfgs = {role: {opt: current_theme[key] for opt, key in opts.items()}
+            for role, opts in _ROLE_OPTIONS.items()}
+    for widget, role in _themed:
+        widget.configure(**cfgs[role])
 
 def toggle_theme():
     global current_theme
@@ -54,14 +108,7 @@ def toggle_theme():
 def process_input():
     input_text = text_input.get("1.0", tk.END)
 
-    pattern = r's:\d+:"(.*?)";s:\d+:"(.*?)";'
-
-    matches = re.findall(pattern, input_text)
-
-    data_dict = {}
-    for key, value in matches:
-        if not any(x in key for x in ['\";', 'a:', 'i:', 'b:', 'N']) and not any(x in value for x in ['a:', 'i:', 'b:', 'N']):
-            data_dict[key] = value
+    data_dict = php_to_dict(input_text)
 
     json_output = json.dumps(data_dict, indent=2)
 
@@ -82,28 +129,29 @@ def save_to_file():
         f.write(output_text)
     messagebox.showinfo("Saved", f"Output saved to {filename}")
 
-root = tk.Tk()
-root.title("PHP Serialized to JSON Converter")
-root.geometry("900x600")
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.title("PHP Serialized to JSON Converter")
+    root.geometry("900x600")
 
-control_frame = tk.Frame(root)
-control_frame.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
+    control_frame = themed(tk.Frame(root), "frame")
+    control_frame.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
 
-tk.Button(control_frame, text="Convert to JSON", command=process_input).pack(fill=tk.X, pady=5)
-tk.Button(control_frame, text="Copy to Clipboard", command=copy_to_clipboard).pack(fill=tk.X, pady=5)
-tk.Button(control_frame, text="Save to File", command=save_to_file).pack(fill=tk.X, pady=5)
-tk.Button(control_frame, text="Toggle Theme", command=toggle_theme).pack(fill=tk.X, pady=5)
+    themed(tk.Button(control_frame, text="Convert to JSON", command=process_input), "button").pack(fill=tk.X, pady=5)
+    themed(tk.Button(control_frame, text="Copy to Clipboard", command=copy_to_clipboard), "button").pack(fill=tk.X, pady=5)
+    themed(tk.Button(control_frame, text="Save to File", command=save_to_file), "button").pack(fill=tk.X, pady=5)
+    themed(tk.Button(control_frame, text="Toggle Theme", command=toggle_theme), "button").pack(fill=tk.X, pady=5)
 
-main_frame = tk.Frame(root)
-main_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
+    main_frame = themed(tk.Frame(root), "frame")
+    main_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-tk.Label(main_frame, text="Paste PHP Serialized Data:").pack(anchor="w")
-text_input = tk.Text(main_frame, height=10, width=100)
-text_input.pack(pady=5, fill=tk.X)
+    themed(tk.Label(main_frame, text="Paste PHP Serialized Data:"), "label").pack(anchor="w")
+    text_input = themed(tk.Text(main_frame, height=10, width=100), "text")
+    text_input.pack(pady=5, fill=tk.X)
 
-tk.Label(main_frame, text="Cleaned JSON Output:").pack(anchor="w")
-text_output = tk.Text(main_frame, height=20, width=100)
-text_output.pack(pady=5, fill=tk.BOTH, expand=True)
+    themed(tk.Label(main_frame, text="Cleaned JSON Output:"), "label").pack(anchor="w")
+    text_output = themed(tk.Text(main_frame, height=20, width=100), "text")
+    text_output.pack(pady=5, fill=tk.BOTH, expand=True)
 
-apply_theme()
-root.mainloop()
+    apply_theme()
+    root.mainloop()
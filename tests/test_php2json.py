@@ -0,0 +1,16 @@
+import php2json
+
+
+def test_length_prefix_mismatch_falls_back_per_pair():
+    text = 's:1:"k";s:1:"v";s:4:"name";s:5:"héllo";'
+    assert php2json.php_to_dict(text) == {"k": "v", "name": "héllo"}
+
+
+def test_nested_array_keeps_pattern_scope():
+    text = 'a:1:{s:5:"outer";a:2:{s:1:"x";s:1:"y";s:1:"z";s:1:"w";}}'
+    assert php2json.php_to_dict(text) == {"z": "w"}
+
+
+def test_value_containing_quote_semicolon():
+    text = 's:1:"k";s:4:"a";b";s:1:"z";s:1:"w";'
+    assert php2json.php_to_dict(text) == {"k": 'a";b', "z": "w"}
@@ -0,0 +1,19 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+import inventory_reconcile_gui as gui
+
+
+@pytest.mark.parametrize("values, expected", [
+    (["1", "2.5", "3"], [1, 3, 3]),
+    (["1", "x"], [1, 0]),
+    (["(3)", "1e400"], [-3, 0]),
+    (["1", "2"], [1, 2]),
+    ([None, "(2.5)", " 1,000 "], [0, -3, 1000]),
+])
+def test_arrow_columns_without_nulls(values, expected):
+    # Null-free Arrow columns used to yield a read-only float view.
+    s = pd.Series(values, dtype=gui._ARROW_STRING)
+    assert gui.to_nullable_int_series(s).tolist() == expected
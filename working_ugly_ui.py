@@ -14,9 +14,9 @@ from __future__ import annotations
 
 import os
 import json
-import queue
 import time
 import threading
+from collections import deque
 from datetime import datetime
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from typing import Optional, Tuple, Dict, List
@@ -324,6 +324,7 @@ class KeysAndPairsDialog(tk.Toplevel):
 
 class App(tk.Tk):
     DEFAULT_CFG = "inventory_reconcile_config.json"
+    LOG_MAX_LINES = 5000
 
     def __init__(self):
         super().__init__()
@@ -342,7 +343,9 @@ class App(tk.Tk):
         }
 
         self._result_frames: Dict[str, pd.DataFrame] = {}
-        self._log_q: "queue.Queue[str]" = queue.Queue()
+        # Bounded: if the GUI falls behind a chatty worker, the oldest lines go.
+        self._log_q: "deque[str]" = deque(maxlen=10_000)
+        self._log_lock = threading.Lock()
         self._worker: Optional[threading.Thread] = None
 
         self._build_ui()
@@ -708,20 +711,28 @@ class App(tk.Tk):
         messagebox.showinfo("Export complete", f"CSV files saved to:\n{base}")
 
     def _log(self, msg: str):
-        ts = datetime.now().strftime("%H:%M:%S")
-        self._log_q.put(f"[{ts}] {msg}\n")
+        ts = time.strftime("%H:%M:%S")
+        with self._log_lock:
+            self._log_q.append(f"[{ts}] {msg}\n")
 
     def _drain_log_queue(self):
+        # Everything queued since the last tick goes in with one insert/see.
+        with self._log_lock:
+            lines = list(self._log_q)
+            self._log_q.clear()
         try:
-            while True:
-                line = self._log_q.get_nowait()
-                self.log_text.insert("end", line)
+            if lines:
+                self.log_text.insert("end", "".join(lines))
+                self._trim_log()
                 self.log_text.see("end")
-        except queue.Empty:
-            pass
         finally:
             self.after(150, self._drain_log_queue)
 
+    def _trim_log(self):
+        # Keep only the newest LOG_MAX_LINES lines in the widget.
+        if int(self.log_text.index("end-1c").split(".")[0]) > self.LOG_MAX_LINES:
+            self.log_text.delete("1.0", f"end-{self.LOG_MAX_LINES}l")
+
 def main():
     app = App()
     app.mainloop()